@@ -7,6 +7,7 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 import os
+import sys
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -49,9 +50,7 @@ def diagram1_cross_section():
     ax.axis('off')
 
     plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, 'diagram1_cross_section.png'),
-                bbox_inches='tight', facecolor='white')
-    plt.close()
+    return fig
 
 
 def diagram2_formation_cycle():
@@ -95,9 +94,7 @@ def diagram2_formation_cycle():
     ax.annotate('', xy=(2.5, 1.8), xytext=(3.7, 1.8), arrowprops=arrow_props)
 
     plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, 'diagram2_formation.png'),
-                bbox_inches='tight', facecolor='white')
-    plt.close()
+    return fig
 
 
 def diagram3_composition():
@@ -145,9 +142,7 @@ def diagram3_composition():
     ax2.set_yticks([])
 
     plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, 'diagram3_composition.png'),
-                bbox_inches='tight', facecolor='white')
-    plt.close()
+    return fig
 
 
 def diagram4_karst_erosion():
@@ -203,17 +198,19 @@ def diagram4_karst_erosion():
 
     ax.axis('off')
     plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, 'diagram4_karst.png'),
-                bbox_inches='tight', facecolor='white')
-    plt.close()
+    return fig
+
+
+# Output file -> function returning the figure; rendered by tools/diagrams.py
+DIAGRAMS = {
+    'diagram1_cross_section.png': diagram1_cross_section,
+    'diagram2_formation.png': diagram2_formation_cycle,
+    'diagram3_composition.png': diagram3_composition,
+    'diagram4_karst.png': diagram4_karst_erosion,
+}
 
 
 if __name__ == '__main__':
-    diagram1_cross_section()
-    print('Generated diagram1_cross_section.png')
-    diagram2_formation_cycle()
-    print('Generated diagram2_formation.png')
-    diagram3_composition()
-    print('Generated diagram3_composition.png')
-    diagram4_karst_erosion()
-    print('Generated diagram4_karst.png')
+    sys.path.insert(0, os.path.join(script_dir, '..', '..', '..', '..'))
+    from tools.diagrams import render_script
+    render_script(__file__)
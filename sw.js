@@ -0,0 +1,177 @@
+// Service worker for kiosk deployments: index.html registers it once the gallery is up.
+//
+// build/precache.js (tools/make_precache.py) lists the URLs cached at install;
+// a new list version installs a fresh precache and drops the old one. Requests
+// are then answered by kind:
+//   shell       index.html, build/gallery.json, build/assets.json: network first,
+//               the cached copy when the network is down or slower than NETWORK_TIMEOUT
+//   versioned   path?v=<hash> and build/<id>/bundle.<hash>.json never change: cache first
+//   other       stale-while-revalidate, keyed without the ?t= cache buster
+// Images and videos go to a separate cache evicted oldest-first past MEDIA_BUDGET
+// bytes; range requests (video seeking) are sliced from a cached full response.
+// Load the page with ?sw=0 to unregister the worker.
+
+const CACHE_PREFIX = 'deeplooking-';
+const RUNTIME_CACHE = CACHE_PREFIX + 'runtime';
+const MEDIA_CACHE = CACHE_PREFIX + 'media';
+const RUNTIME_LIMIT = 400;                 // entries
+const MEDIA_BUDGET = 200 * 1024 * 1024;    // bytes
+const NETWORK_TIMEOUT = 3000;              // ms
+
+self.PRECACHE = null;
+try {
+  importScripts('build/precache.js');
+} catch (e) {
+  // No build output: cache the page itself and everything else at runtime
+}
+const PRECACHE = self.PRECACHE || { version: 'dev', urls: ['index.html'] };
+const PRECACHE_CACHE = CACHE_PREFIX + 'precache-' + PRECACHE.version;
+
+const SHELL = ['index.html', 'build/gallery.json', 'build/assets.json'].map(p => new URL(p, self.location).href);
+const MEDIA_RE = /\.(jpe?g|png|webp|avif|gif|svg|mp4|webm|mov)$/i;
+const BUNDLE_RE = /\/bundle\.[0-9a-f]+\.json$/;
+
+self.addEventListener('install', (event) => {
+  // One missing file (e.g. an image without its derivatives) must not fail the install
+  event.waitUntil(caches.open(PRECACHE_CACHE)
+    .then(cache => Promise.allSettled(PRECACHE.urls.map(url =>
+      cache.add(new Request(new URL(url, self.location), { cache: 'no-cache' })))))
+    .then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(caches.keys()
+    .then(keys => Promise.all(keys
+      .filter(key => key.startsWith(CACHE_PREFIX + 'precache-') && key !== PRECACHE_CACHE)
+      .map(key => caches.delete(key))))
+    .then(() => self.clients.claim()));
+});
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+  if (request.headers.has('range')) {
+    event.respondWith(rangeResponse(event, url));
+  } else if (request.mode === 'navigate' || SHELL.includes(url.origin + url.pathname)) {
+    event.respondWith(networkFirst(event, request, url));
+  } else if (url.searchParams.has('v') || BUNDLE_RE.test(url.pathname)) {
+    event.respondWith(cacheFirst(event, request, url));
+  } else {
+    event.respondWith(staleWhileRevalidate(event, url));
+  }
+});
+
+function isMedia(url) {
+  return MEDIA_RE.test(url.pathname);
+}
+
+function cacheName(url) {
+  return isMedia(url) ? MEDIA_CACHE : RUNTIME_CACHE;
+}
+
+// --- Store a response; runtime and media caches are trimmed after every write ---
+async function put(url, key, response) {
+  if (!response.ok || response.status !== 200) return;
+  const name = cacheName(url);
+  const cache = await caches.open(name);
+  await cache.put(key, response);
+  await (name === MEDIA_CACHE ? trimMedia(cache) : trimRuntime(cache));
+}
+
+// Cache keys come back in insertion order, so the oldest entries go first
+async function trimRuntime(cache) {
+  const keys = await cache.keys();
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - RUNTIME_LIMIT)).map(key => cache.delete(key)));
+}
+
+async function trimMedia(cache) {
+  const keys = await cache.keys();
+  const sizes = await Promise.all(keys.map(async key => {
+    const response = await cache.match(key);
+    const length = Number(response.headers.get('content-length'));
+    return length || (await response.blob()).size;
+  }));
+  let total = sizes.reduce((a, b) => a + b, 0);
+  for (let i = 0; i < keys.length - 1 && total > MEDIA_BUDGET; i++) {
+    await cache.delete(keys[i]);
+    total -= sizes[i];
+  }
+}
+
+function timeout(ms) {
+  return new Promise((_resolve, reject) => setTimeout(() => reject(new Error('timeout')), ms));
+}
+
+async function networkFirst(event, request, url) {
+  // Navigations with ?perf=1 etc. fall back to the cached page without the query
+  const key = request.mode === 'navigate' ? new URL('index.html', self.location).href : url.href;
+  const network = fetch(request);
+  event.waitUntil(network.then(response => put(url, key, response.clone())).catch(() => {}));
+  try {
+    return await Promise.race([network, timeout(NETWORK_TIMEOUT)]);
+  } catch (e) {
+    const cached = await caches.match(key, { ignoreSearch: request.mode === 'navigate' });
+    return cached || network;
+  }
+}
+
+async function cacheFirst(event, request, url) {
+  const cached = await caches.match(url.href);
+  if (cached) return cached;
+  const response = await fetch(request);
+  event.waitUntil(put(url, url.href, response.clone()));
+  return response;
+}
+
+async function staleWhileRevalidate(event, url) {
+  // ?t=<timestamp> busts the HTTP cache during development; here it would defeat caching
+  url.searchParams.delete('t');
+  const cached = await caches.match(url.href);
+  const network = fetch(url.href, { cache: 'no-cache' }).then(response => {
+    event.waitUntil(put(url, url.href, response.clone()));
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+// --- Video seeking: slice a cached full response, else pass through and cache the whole file ---
+const mediaFetches = new Set();
+
+async function rangeResponse(event, url) {
+  const cached = await caches.match(url.href);
+  if (!cached) {
+    if (!mediaFetches.has(url.href)) {
+      mediaFetches.add(url.href);
+      event.waitUntil(fetch(url.href).then(response => put(url, url.href, response))
+        .catch(() => {}).finally(() => mediaFetches.delete(url.href)));
+    }
+    return fetch(event.request);
+  }
+  const blob = await cached.blob();
+  const match = /bytes=(\d*)-(\d*)/.exec(event.request.headers.get('range'));
+  let start = match && match[1] ? Number(match[1]) : 0;
+  let end = match && match[2] ? Number(match[2]) : blob.size - 1;
+  if (match && !match[1] && match[2]) {
+    start = Math.max(0, blob.size - Number(match[2]));
+    end = blob.size - 1;
+  }
+  if (start >= blob.size) {
+    return new Response(null, { status: 416, headers: { 'Content-Range': 'bytes */' + blob.size } });
+  }
+  end = Math.min(end, blob.size - 1);
+  return new Response(blob.slice(start, end + 1), {
+    status: 206,
+    headers: {
+      'Content-Type': cached.headers.get('content-type') || '',
+      'Content-Length': String(end - start + 1),
+      'Content-Range': 'bytes ' + start + '-' + end + '/' + blob.size,
+      'Accept-Ranges': 'bytes'
+    }
+  });
+}
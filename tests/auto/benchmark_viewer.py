@@ -0,0 +1,384 @@
+"""Benchmark the viewer in headless Chrome and compare against a stored baseline.
+
+Serves the repository from a local static server on a free port and, for
+every gallery image, measures with the Performance API:
+
+  gallery      first paint, first contentful paint, largest contentful paint
+               and the time until every thumbnail in view has loaded
+  viewer       click on the thumbnail -> artwork shown -> data-ready (the
+               app's own signal) -> hover answers (the first frame in which a
+               pointer over the artwork gets a tooltip)
+  hover        dispatch time and time to the next frame (when the viewer has
+               resolved the hover) for every mousemove of a serpentine sweep
+               over the artwork
+  popups       click -> popup in the DOM and painted, for N popups
+  heap         used JS heap, DOM nodes and event listeners before and after N
+               popups (after a forced GC); popups are capped and recycled, so
+               a long run (--popups 5000) doubles as a soak test: node and
+               listener growth should not depend on N
+
+The page is loaded with ?perf=silent, so the sweep also collects the viewer's
+own hover instrumentation (window.hoverPerf): per-stage handler timings,
+frames dropped while hovering and long tasks. --no-perf turns it off to
+measure the uninstrumented page. Predictive prefetch is off (?prefetch=0) so
+every click measures a cold viewer; --prefetch leaves it on.
+
+Every run starts from a fresh page load with the browser cache disabled.
+Scalar metrics are the median over --runs; hover latency pools every sample
+and reports p50/p95/max. Results are written to build/benchmarks/ and compared
+with tests/auto/benchmark_baseline.json: a metric that is both more than
+--tolerance slower (relative) and above a small absolute floor is a
+regression, and the script exits with status 1. A missing baseline is an
+error too, unless --update-baseline is given to create it.
+
+Usage (from the repository root; needs selenium and Chrome):
+  python tests/auto/benchmark_viewer.py [--runs 3] [--popups 10] [--sweep 200] [id ...]
+  python tests/auto/benchmark_viewer.py --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from harness import ROOT, GalleryPage, start_driver, start_server
+
+sys.path.insert(0, ROOT)
+from tools.content import BUILD_DIR, load_gallery
+
+BASELINE = os.path.join(ROOT, "tests", "auto", "benchmark_baseline.json")
+RESULTS_DIR = os.path.join(BUILD_DIR, "benchmarks")
+# Differences below these are noise whatever the relative change
+FLOOR_MS = 5.0
+FLOOR_MB = 1.0
+
+# Shared helpers for the async scripts below: wait for the next frame, poll until a condition holds
+HELPERS = """
+const frame = () => new Promise(resolve => requestAnimationFrame(() => resolve(performance.now())));
+async function until(test, timeout) {
+  const start = performance.now();
+  while (!test()) {
+    if (performance.now() - start > timeout) return false;
+    await frame();
+  }
+  return true;
+}
+"""
+
+GALLERY_JS = HELPERS + """
+const done = arguments[arguments.length - 1];
+(async () => {
+  // The gallery renders and loads only the thumbnails near the viewport
+  const inView = img => {
+    const r = img.getBoundingClientRect();
+    return r.bottom > 0 && r.top < window.innerHeight;
+  };
+  const thumbs = () => [...document.querySelectorAll('.gallery-item img')].filter(inView);
+  await until(() => thumbs().length > 0 && thumbs().every(img => img.complete && img.naturalWidth > 0), 30000);
+  const thumbnailsLoaded = await frame();
+  let lcp = null;
+  try {
+    new PerformanceObserver(list => {
+      const entries = list.getEntries();
+      lcp = entries[entries.length - 1].startTime;
+    }).observe({ type: 'largest-contentful-paint', buffered: true });
+  } catch (e) {}
+  await new Promise(resolve => setTimeout(resolve, 0));
+  const paint = Object.fromEntries(performance.getEntriesByType('paint').map(e => [e.name, e.startTime]));
+  const nav = performance.getEntriesByType('navigation')[0];
+  done({
+    firstPaint: paint['first-paint'] ?? null,
+    firstContentfulPaint: paint['first-contentful-paint'] ?? null,
+    largestContentfulPaint: lcp,
+    domContentLoaded: nav ? nav.domContentLoadedEventEnd : null,
+    thumbnailsLoaded: thumbnailsLoaded,
+  });
+})();
+"""
+
+VIEWER_JS = HELPERS + """
+const done = arguments[arguments.length - 1];
+(async () => {
+  const art = document.getElementById('artwork');
+  const tip = document.querySelector('.segment-tooltip');
+  const viewer = document.getElementById('viewer-screen');
+  const start = performance.now();
+  document.querySelector(`.gallery-item[data-index="${arguments[0]}"]`).click();
+  await until(() => !viewer.classList.contains('hidden'), 10000);
+  const shown = await frame();
+  await until(() => art.complete && art.naturalWidth > 0, 30000);
+  const decoded = await frame();
+  await until(() => viewer.dataset.ready === 'true', 30000);
+  const ready = await frame();
+  // Interactive once a pointer on a 7 x 7 grid over the artwork gets a tooltip. Hovers are
+  // resolved once per frame, so this moves to the next grid point and checks every frame.
+  let point = 0;
+  const answers = () => {
+    if (tip.style.display === 'block') return true;
+    const r = art.getBoundingClientRect();
+    const gx = point % 7 + 1, gy = Math.floor(point / 7) % 7 + 1;
+    point++;
+    art.dispatchEvent(new MouseEvent('mousemove', {
+      clientX: r.left + r.width * gx / 8, clientY: r.top + r.height * gy / 8, bubbles: true }));
+    return false;
+  };
+  const ok = await until(answers, 30000);
+  const interactive = performance.now();
+  art.dispatchEvent(new MouseEvent('mouseleave'));
+  done({
+    viewerShown: shown - start,
+    artworkLoaded: decoded - start,
+    viewerReady: ready - start,
+    viewerInteractive: ok ? interactive - start : null,
+  });
+})();
+"""
+
+HOVER_JS = HELPERS + """
+const done = arguments[arguments.length - 1];
+(async () => {
+  const steps = arguments[0];
+  const art = document.getElementById('artwork');
+  const tip = document.querySelector('.segment-tooltip');
+  const r = art.getBoundingClientRect();
+  const rows = Math.max(2, Math.round(Math.sqrt(steps / 4)));
+  const perRow = Math.ceil(steps / rows);
+  const handler = [], toFrame = [], targets = {};
+  if (window.hoverPerf) window.hoverPerf.reset();
+  for (let i = 0; i < steps; i++) {
+    const row = Math.floor(i / perRow), col = i % perRow;
+    const fx = (row % 2 ? perRow - 1 - col : col + 0.5) / perRow;
+    const x = r.left + r.width * Math.min(0.99, Math.max(0.01, fx));
+    const y = r.top + r.height * (row + 0.5) / rows;
+    await frame();
+    const t0 = performance.now();
+    art.dispatchEvent(new MouseEvent('mousemove', { clientX: x, clientY: y, bubbles: true }));
+    const t1 = performance.now();
+    const t2 = await frame();
+    handler.push(t1 - t0);
+    toFrame.push(t2 - t0);
+    const label = tip.style.display === 'block' ? tip.textContent.replace(/ \\u2026$/, '') : null;
+    if (label && !(label in targets)) targets[label] = [x, y];
+  }
+  art.dispatchEvent(new MouseEvent('mouseleave'));
+  const perf = window.hoverPerf ? window.hoverPerf.summary() : null;
+  done({ handler: handler, frame: toFrame, targets: Object.values(targets), perf: perf });
+})();
+"""
+
+POPUP_JS = HELPERS + """
+const done = arguments[arguments.length - 1];
+(async () => {
+  const [targets, count] = [arguments[0], arguments[1]];
+  const art = document.getElementById('artwork');
+  const popups = () => [...document.querySelectorAll('.popup.pinned')];
+  // Popups are capped and recycled: a new one has a higher data-serial than any before it
+  const newest = () => Math.max(0, ...popups().map(el => Number(el.dataset.serial)));
+  const times = [];
+  for (let i = 0; i < count && targets.length; i++) {
+    const [x, y] = targets[i % targets.length];
+    const before = newest();
+    await frame();
+    const t0 = performance.now();
+    art.dispatchEvent(new MouseEvent('click', { clientX: x, clientY: y, bubbles: true }));
+    if (!await until(() => newest() > before, 10000)) break;
+    times.push(await frame() - t0);
+  }
+  done({ open: times, count: popups().length });
+})();
+"""
+
+HEAP_JS = "return performance.memory ? performance.memory.usedJSHeapSize : null;"
+
+PERF_STAGES = ("rect", "lookup", "tooltip", "outline", "total")
+
+
+def used_heap_mb(driver):
+    driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+    used = driver.execute_script(HEAP_JS)
+    return None if used is None else used / 2 ** 20
+
+
+def dom_counters(driver):
+    """Live DOM nodes and JS event listeners of the page."""
+    return driver.execute_cdp_cmd("Memory.getDOMCounters", {})
+
+
+def measure_image(driver, url, index, sweep, popups):
+    """One fresh page load: gallery paint, then open gallery item ``index`` and measure the viewer."""
+    page = GalleryPage(driver, url).open()
+    gallery = driver.execute_async_script(GALLERY_JS)
+    page.item(index)
+    viewer = driver.execute_async_script(VIEWER_JS, index)
+    hover = driver.execute_async_script(HOVER_JS, sweep)
+    heap_before = used_heap_mb(driver)
+    counters = dom_counters(driver)
+    opened = driver.execute_async_script(POPUP_JS, hover["targets"], popups)
+    heap_after = used_heap_mb(driver)
+    after = dom_counters(driver)
+    opened["nodeGrowth"] = after["nodes"] - counters["nodes"]
+    opened["listenerGrowth"] = after["jsEventListeners"] - counters["jsEventListeners"]
+    return gallery, viewer, hover, opened, heap_before, heap_after
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def summarize(samples):
+    """Reduce the per-run samples of one image to its scalar metrics."""
+    handler = [t for s in samples for t in s["hover"]["handler"]]
+    frame = [t for s in samples for t in s["hover"]["frame"]]
+    popup = [t for s in samples for t in s["popups"]["open"]]
+    perf = [s["hover"]["perf"] for s in samples if s["hover"].get("perf")]
+    instrumented = {}
+    if perf:
+        for stage in PERF_STAGES:
+            runs = [p["stages"][stage] for p in perf if stage in p["stages"]]
+            instrumented[f"{stage}Mean"] = median([r["mean"] for r in runs])
+            instrumented[f"{stage}P95"] = median([r["p95"] for r in runs])
+        instrumented["framesDropped"] = median([p["framesDropped"] for p in perf])
+        instrumented["longTasks"] = median([p["longTasks"] for p in perf])
+    return {
+        **{k: median([s["viewer"][k] for s in samples]) for k in ("viewerShown", "artworkLoaded", "viewerReady", "viewerInteractive")},
+        "hoverHandlerP50": percentile(handler, 50),
+        "hoverHandlerP95": percentile(handler, 95),
+        "hoverFrameP50": percentile(frame, 50),
+        "hoverFrameP95": percentile(frame, 95),
+        "hoverFrameMax": max(frame) if frame else None,
+        "popupOpenP50": percentile(popup, 50),
+        "popupOpenMax": max(popup) if popup else None,
+        "popupsOpened": median([s["popups"]["count"] for s in samples]),
+        "popupNodeGrowth": median([s["popups"]["nodeGrowth"] for s in samples]),
+        "popupListenerGrowth": median([s["popups"]["listenerGrowth"] for s in samples]),
+        "heapBeforePopupsMB": median([s["heapBeforeMB"] for s in samples]),
+        "heapAfterPopupsMB": median([s["heapAfterMB"] for s in samples]),
+        **({"hoverPerf": instrumented} if instrumented else {}),
+    }
+
+
+def run(ids, runs, sweep, popups, headless=True, perf=True, prefetch=False):
+    gallery_ids = load_gallery()
+    server, url = start_server()
+    params = (["perf=silent"] if perf else []) + ([] if prefetch else ["prefetch=0"])
+    if params:
+        url += "?" + "&".join(params)
+    driver = start_driver(headless, cache=False)
+    samples = {image_id: [] for image_id in ids}
+    gallery = []
+    try:
+        for r in range(runs):
+            for image_id in ids:
+                start = time.monotonic()
+                g, viewer, hover, opened, before, after = measure_image(
+                    driver, url, gallery_ids.index(image_id), sweep, popups)
+                gallery.append(g)
+                samples[image_id].append({"viewer": viewer, "hover": hover, "popups": opened,
+                                          "heapBeforeMB": before, "heapAfterMB": after})
+                print(f"run {r + 1}/{runs} {image_id}: interactive {viewer['viewerInteractive']} ms, "
+                      f"{len(opened['open'])} popups ({time.monotonic() - start:.1f}s)")
+        user_agent = driver.execute_script("return navigator.userAgent;")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "userAgent": user_agent,
+            "runs": runs,
+            "sweep": sweep,
+            "popups": popups,
+            "perf": perf,
+            "prefetch": prefetch,
+        },
+        "summary": {
+            "gallery": {k: median([g[k] for g in gallery]) for k in gallery[0]},
+            "images": {image_id: summarize(s) for image_id, s in samples.items()},
+        },
+        "samples": {"gallery": gallery, "images": samples},
+    }
+
+
+def git_commit():
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def flatten(summary, prefix=""):
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def compare(summary, baseline, tolerance):
+    """Return [(metric, baseline, current)] for metrics that regressed beyond tolerance and floor."""
+    regressions = []
+    base = dict(flatten(baseline))
+    for key, value in flatten(summary):
+        old = base.get(key)
+        if value is None or old is None or key.endswith("popupsOpened"):
+            continue
+        floor = FLOOR_MB if key.endswith("MB") else FLOOR_MS
+        if value > old * (1 + tolerance) and value - old > floor:
+            regressions.append((key, old, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh page loads per image")
+    parser.add_argument("--sweep", type=int, default=200, help="mousemove events per hover sweep")
+    parser.add_argument("--popups", type=int, default=10, help="popups to open per run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run's summary as the baseline")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--no-perf", action="store_true", help="do not enable the viewer's hover instrumentation")
+    parser.add_argument("--prefetch", action="store_true", help="let the gallery prefetch viewers before the click")
+    args = parser.parse_args()
+    # Without a baseline nothing can regress, so a check run would always pass
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+
+    results = run(args.ids or load_gallery(), args.runs, args.sweep, args.popups,
+                  headless=not args.headed, perf=not args.no_perf, prefetch=args.prefetch)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    for name in (f"{stamp}.json", "latest.json"):
+        with open(os.path.join(RESULTS_DIR, name), "w") as f:
+            json.dump(results, f, indent=1)
+    print(json.dumps(results["summary"], indent=1))
+    print(f"Results: {os.path.join(RESULTS_DIR, stamp + '.json')}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": results["meta"], "summary": results["summary"]}, f, indent=1)
+        print(f"Baseline updated: {args.baseline}")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results["summary"], baseline["summary"], args.tolerance)
+    for key, old, new in regressions:
+        print(f"REGRESSION {key}: {old:.1f} -> {new:.1f}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against baseline from {baseline['meta']['commit']} ({baseline['meta']['date']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Fixtures for the UI tests: one static server and one Chrome session per test process.
+
+Run from the repository root (needs selenium and Chrome; pytest-xdist for -n):
+  python -m pytest tests/auto -n auto
+Each xdist worker gets its own server and browser. Set HEADED=1 to watch the
+browser. A failing test leaves a screenshot in build/test-screenshots/.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def site():
+    from harness import start_server
+    server, url = start_server()
+    yield url
+    server.shutdown()
+
+
+@pytest.fixture(scope="session")
+def browser():
+    from harness import start_driver
+    driver = start_driver(headless=not os.environ.get("HEADED"))
+    yield driver
+    driver.quit()
+
+
+@pytest.fixture
+def gallery(browser, site):
+    """The gallery, freshly loaded in the shared session."""
+    from harness import GalleryPage
+    return GalleryPage(browser, site).open()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = yield
+    driver = item.funcargs.get("browser") if hasattr(item, "funcargs") else None
+    if report.failed and call.when == "call" and driver is not None:
+        from harness import ROOT
+        out = os.path.join(ROOT, "build", "test-screenshots")
+        os.makedirs(out, exist_ok=True)
+        driver.save_screenshot(os.path.join(out, item.name + ".png"))
+    return report
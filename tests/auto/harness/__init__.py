@@ -0,0 +1,10 @@
+"""Shared Selenium harness for the UI tests, benchmarks and screenshot scripts.
+
+browser.py starts a local static server and a Chrome session; pages.py holds
+page objects for the gallery, viewer, popups and lightbox, which wait on the
+readiness signals index.html exposes instead of sleeping.
+"""
+from .browser import ROOT, start_driver, start_server
+from .pages import GalleryPage, Lightbox, Popup, ViewerPage
+
+__all__ = ["ROOT", "start_driver", "start_server", "GalleryPage", "Lightbox", "Popup", "ViewerPage"]
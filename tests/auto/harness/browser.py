@@ -0,0 +1,37 @@
+"""Local static server and Chrome session for the UI tests."""
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium import webdriver
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(root=ROOT):
+    """Serve ``root`` on a free localhost port; returns (server, index.html URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/index.html"
+
+
+def start_driver(headless=True, cache=True, window=(1400, 900)):
+    """Start Chrome; ``cache=False`` disables the HTTP cache and bypasses sw.js so every load is cold."""
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={window[0]},{window[1]}")
+    options.add_argument("--enable-precise-memory-info")
+    driver = webdriver.Chrome(options=options)
+    driver.set_script_timeout(120)
+    if not cache:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        driver.execute_cdp_cmd("Network.setBypassServiceWorker", {"bypass": True})
+    return driver
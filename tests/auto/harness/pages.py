@@ -0,0 +1,216 @@
+"""Page objects for index.html.
+
+Every action waits on something the app does rather than on a timer:
+data-ready on #gallery-screen and #viewer-screen (set by index.html once the
+gallery is built, and once the viewer's artwork, hit-testing and lenses are
+all live), popups appearing in or leaving the DOM, and the lightbox display.
+The gallery only renders the rows near the viewport, so items are found by
+their data-index, scrolling until they are rendered. Popups are recycled and
+capped, so a new one is recognised by its data-serial, not by the count.
+Pointer actions on the artwork dispatch synthetic events at fractions of its
+size, so positions do not depend on the window size. Clicks are handled
+synchronously; hovers are resolved once per animation frame, so hover()
+returns after the next frame.
+"""
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+TIMEOUT = 15
+
+POINTER_JS = """
+const [type, fx, fy] = arguments;
+const art = document.getElementById('artwork');
+const r = art.getBoundingClientRect();
+const x = r.left + r.width * fx, y = r.top + r.height * fy;
+art.dispatchEvent(new MouseEvent(type, { clientX: x, clientY: y, bubbles: true }));
+return [x, y];
+"""
+
+# Hover updates run in requestAnimationFrame; a callback queued after the event runs after them
+HOVER_JS = POINTER_JS.replace("return [x, y];", "requestAnimationFrame(() => arguments[arguments.length - 1]([x, y]));")
+
+NEWEST_POPUP_JS = """
+const serials = [...document.querySelectorAll('.popup.pinned')].map(el => Number(el.dataset.serial));
+return Math.max(0, ...serials);
+"""
+
+# Scroll the gallery a viewport towards item arguments[0]; returns false at either end.
+# The gallery re-renders in the next frame, so this returns after two frames.
+SCROLL_GALLERY_JS = """
+const [index, done] = arguments;
+const shown = [...document.querySelectorAll('.gallery-item')].map(el => Number(el.dataset.index));
+const down = !shown.length || index > Math.max(...shown);
+const before = window.scrollY;
+window.scrollBy(0, (down ? 1 : -1) * window.innerHeight * 0.8);
+const moved = window.scrollY !== before;
+requestAnimationFrame(() => requestAnimationFrame(() => done(moved)));
+"""
+
+
+def wait(driver, condition, timeout=TIMEOUT):
+    return WebDriverWait(driver, timeout).until(condition)
+
+
+class GalleryPage:
+    def __init__(self, driver, url):
+        self.driver = driver
+        self.url = url
+
+    def open(self):
+        """Load index.html and wait until every gallery item is in place."""
+        self.driver.get(self.url)
+        return self.wait_ready()
+
+    def wait_ready(self):
+        wait(self.driver, EC.visibility_of_element_located((By.CSS_SELECTOR, "#gallery-screen[data-ready='true']")))
+        return self
+
+    @property
+    def items(self):
+        return self.driver.find_elements(By.CSS_SELECTOR, ".gallery-item")
+
+    def titles(self):
+        return [item.find_element(By.CLASS_NAME, "item-title").text for item in self.items]
+
+    def item(self, index):
+        """Gallery item ``index``, scrolling until the gallery has rendered it."""
+        selector = f".gallery-item[data-index='{index}']"
+        while True:
+            found = self.driver.find_elements(By.CSS_SELECTOR, selector)
+            if found:
+                return found[0]
+            if not self.driver.execute_async_script(SCROLL_GALLERY_JS, index):
+                raise LookupError(f"no gallery item {index}")
+
+    def open_viewer(self, index):
+        """Click gallery item ``index`` and wait until its viewer is interactive."""
+        self.item(index).click()
+        return ViewerPage(self.driver).wait_ready()
+
+
+class ViewerPage:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def wait_ready(self):
+        wait(self.driver, EC.presence_of_element_located((By.CSS_SELECTOR, "#viewer-screen[data-ready='true']")))
+        return self
+
+    @property
+    def visible(self):
+        return "hidden" not in self.driver.find_element(By.ID, "viewer-screen").get_attribute("class")
+
+    @property
+    def subtitle(self):
+        return self.driver.find_element(By.ID, "viewer-subtitle").text
+
+    @property
+    def tooltip(self):
+        return self.driver.find_element(By.CSS_SELECTOR, ".segment-tooltip:not(.loading)")
+
+    def hover(self, fx, fy):
+        """Move the pointer to (fx, fy) of the artwork; return the tooltip text, or None when hidden."""
+        self.driver.execute_async_script(HOVER_JS, "mousemove", fx, fy)
+        tooltip = self.tooltip
+        return tooltip.text if tooltip.is_displayed() else None
+
+    def leave(self):
+        self.driver.execute_script(POINTER_JS, "mouseleave", 0, 0)
+
+    def popups(self):
+        return [Popup(self.driver, el) for el in self.driver.find_elements(By.CSS_SELECTOR, ".popup.pinned")]
+
+    def newest_serial(self):
+        return self.driver.execute_script(NEWEST_POPUP_JS)
+
+    def newest_popup(self, after):
+        """The popup opened after serial ``after``, or None."""
+        serial = self.newest_serial()
+        if serial <= after:
+            return None
+        return Popup(self.driver, self.driver.find_element(By.CSS_SELECTOR, f".popup.pinned[data-serial='{serial}']"))
+
+    def click(self, fx, fy):
+        """Click at (fx, fy) of the artwork; return the popup it opened, or None for a segment without lenses."""
+        before = self.newest_serial()
+        self.driver.execute_script(POINTER_JS, "click", fx, fy)
+        return self.newest_popup(before)
+
+    @property
+    def whole_image_button(self):
+        return self.driver.find_element(By.ID, "image-lens-btn")
+
+    def open_whole_image(self):
+        before = self.newest_serial()
+        self.whole_image_button.click()
+        return wait(self.driver, lambda d: self.newest_popup(before))
+
+    def back(self):
+        """Return to the gallery; all popups are closed."""
+        self.driver.find_element(By.ID, "back-btn").click()
+        wait(self.driver, EC.visibility_of_element_located((By.ID, "gallery-screen")))
+        return GalleryPage(self.driver, self.driver.current_url).wait_ready()
+
+
+class Popup:
+    def __init__(self, driver, element):
+        self.driver = driver
+        self.element = element
+
+    @property
+    def title(self):
+        return self.element.find_element(By.CLASS_NAME, "poem-title").text
+
+    @property
+    def tabs(self):
+        return [tab.text for tab in self.element.find_elements(By.CLASS_NAME, "lens-tab")]
+
+    @property
+    def active_tab(self):
+        return self.element.find_element(By.CSS_SELECTOR, ".lens-tab.active").text
+
+    def select_tab(self, name):
+        tab = next(t for t in self.element.find_elements(By.CLASS_NAME, "lens-tab") if t.text == name)
+        tab.click()
+        wait(self.driver, lambda d: "active" in tab.get_attribute("class"))
+        return self
+
+    @property
+    def image(self):
+        return self.element.find_element(By.CLASS_NAME, "poem-image")
+
+    @property
+    def video(self):
+        return self.element.find_element(By.CSS_SELECTOR, "video.poem-video")
+
+    def close(self):
+        self.element.find_element(By.CLASS_NAME, "popup-close").click()
+        wait(self.driver, EC.staleness_of(self.element))
+
+    def open_lightbox(self):
+        """Click the popup's image and wait for the lightbox."""
+        wait(self.driver, lambda d: self.driver.execute_script("return arguments[0].complete;", self.image))
+        self.image.click()
+        return Lightbox(self.driver).wait_open()
+
+
+class Lightbox:
+    def __init__(self, driver):
+        self.driver = driver
+
+    @property
+    def element(self):
+        return self.driver.find_element(By.ID, "lightbox")
+
+    @property
+    def is_open(self):
+        return self.element.is_displayed()
+
+    def wait_open(self):
+        wait(self.driver, EC.visibility_of_element_located((By.ID, "lightbox")))
+        return self
+
+    def dismiss(self):
+        self.element.click()
+        wait(self.driver, EC.invisibility_of_element_located((By.ID, "lightbox")))
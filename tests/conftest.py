@@ -0,0 +1,8 @@
+"""Unit tests for the build tools; run from the repository root:
+  python -m pytest tests
+The UI tests in tests/auto skip themselves without selenium.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
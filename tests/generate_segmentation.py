@@ -3,18 +3,12 @@ Use Nano Banana Pro (Gemini image model) to generate a segmentation mask image.
 The mask is used directly as a pixel-lookup table for hover detection.
 """
 import os
-from google import genai
-from google.genai import types
+import sys
 from PIL import Image
 
-# Load API key
-with open(os.path.expanduser("~/.env")) as f:
-    for line in f:
-        if line.startswith("VITE_GEMINI_API_KEY="):
-            api_key = line.strip().split("=", 1)[1]
-            break
-
-client = genai.Client(api_key=api_key)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from tools import gemini
+from tools.generate import ILLUSTRATION_PROMPT, MASK_PROMPTS, POEM_EXCERPTS
 
 # Load artwork image
 im = Image.open("images/marsh/marsh.jpeg")
@@ -22,7 +16,7 @@ w, h = im.size
 print(f"Artwork size: {w} x {h}")
 
 # Step 1: Generate segmentation mask image via Nano Banana
-prompt = "create detailed segmentation of this image. Use flat solid colors only. Do not include any text in the produced image."
+prompt = MASK_PROMPTS["marsh"][0]
 
 print("Requesting segmentation mask from Gemini image model...")
 
@@ -32,82 +26,33 @@ models_to_try = ["gemini-3-pro-image-preview"]
 for model_name in models_to_try:
     try:
         print(f"  Trying model: {model_name}")
-        response = client.models.generate_content(
-            model=model_name,
-            contents=[prompt, im],
-            config=types.GenerateContentConfig(
-                response_modalities=['IMAGE']
-            )
-        )
-
-        # Extract and save the segmentation mask
-        for part in response.parts:
-            if part.inline_data is not None:
-                mask_image = part.as_image()
-                # Resize mask to match artwork dimensions for pixel-perfect alignment
-                if hasattr(mask_image, 'size') and mask_image.size != (w, h):
-                    print(f"  Mask is {mask_image.size}, resizing to {w}x{h}")
-                    mask_image = mask_image.resize((w, h), Image.NEAREST)
-                mask_image.save("outputs/segmentation_mask.png")
-                print(f"  Saved segmentation mask")
-                break
-        else:
-            print(f"  No image in response from {model_name}")
-            continue
-        break  # Success
+        parts = gemini.generate(prompt, image_path="images/marsh/marsh.jpeg", model=model_name)
+        # Resize mask to match artwork dimensions for pixel-perfect alignment
+        if gemini.save_image(parts, "outputs/segmentation_mask.png", size=(w, h)):
+            print(f"  Saved segmentation mask")
+            break
+        print(f"  No image in response from {model_name}")
     except Exception as e:
         print(f"  Error with {model_name}: {e}")
-        continue
 
 # Step 2: Generate poem-inspired images for each region
-poems = {
-    "boardwalk": """My breath, turned smoke, is rising on the air.
-In the background, not completely in focus,
-lies the resort itself (the sea unseen),
-a mise-en-scène of small shops, baths, hotels,
-lining the boardwalk; a few scattered figures,
-fading to haze, to blur, loom in the distance,
-early walkers like us, although it seems
-we have the boardwalk largely to ourselves.""",
-    "marsh": """Where band-neck'd partridges roost in a ring on the ground with their heads out,
-Where burial coaches enter the arch'd gates of a cemetery,
-Where winter wolves bark amid wastes of snow and icicled trees,
-Where the yellow-crown'd heron comes to the edge of the marsh at night and feeds upon small crabs,
-Where the splash of swimmers and divers cools the warm noon""",
-    "sky": """Of Chambers as the Cedars –
-Impregnable of eye –
-And for an everlasting Roof
-The Gambrels of the Sky""",
-    "water": """Water, water, every where,
-And all the boards did shrink;
-Water, water, every where,
-Nor any drop to drink"""
-}
+poems = POEM_EXCERPTS["marsh"]
+
 
 print("\nGenerating poem-inspired images...")
 for keyword, poem_text in poems.items():
     outpath = f"images/marsh/marsh_{keyword}.png"
-    prompt = f"Create a painterly artistic illustration inspired by this poem. Do not include any text in the produced image.\n{poem_text}"
+    prompt = ILLUSTRATION_PROMPT.format(text=poem_text)
     print(f"  Generating image for '{keyword}'...")
     try:
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                response_modalities=['IMAGE']
-            )
-        )
-        for part in response.parts:
-            if part.inline_data is not None:
-                poem_img = part.as_image()
-                poem_img.save(outpath)
-                print(f"  Saved {outpath}")
-                break
+        if gemini.save_image(gemini.generate(prompt), outpath):
+            print(f"  Saved {outpath}")
         else:
             print(f"  No image in response for {keyword}")
     except Exception as e:
         print(f"  Error generating {keyword}: {e}")
 
+gemini.report()
 print("\nDone. The mask image is used directly as a pixel-lookup table in index.html.")
 print("Color mapping: Black=Sky, Green=Vegetation, Red=Boardwalk, Blue=Water")
 print("Poem images saved to images/marsh/marsh_*.png")
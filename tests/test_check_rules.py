@@ -0,0 +1,50 @@
+"""Tests for rule validation and coverage analysis in tools/check_rules.py."""
+import numpy as np
+
+from tools import check_rules
+from tools.check_rules import analyze, validate_rule
+
+
+def test_valid_rule():
+    assert validate_rule({"r_gt": 200, "g_lt": 50, "b_lt": 50}) == []
+
+
+def test_unknown_key_and_out_of_range_threshold():
+    assert validate_rule({"red_gt": 1, "g_lt": 300}) == ["unknown key 'red_gt'", "g_lt=300 is outside 0-255"]
+
+
+def test_empty_range():
+    assert validate_rule({"r_gt": 100, "r_lt": 101}) == ["r_gt=100 and r_lt=101 leave no value"]
+
+
+def test_non_numeric_threshold_is_reported_not_raised():
+    assert validate_rule({"r_gt": "100", "r_lt": 50}) == ["r_gt='100' is not a number"]
+    assert validate_rule({"b_lt": True}) == ["b_lt=True is not a number"]
+
+
+def test_empty_rule():
+    assert validate_rule({}) == ["empty rule matches every pixel"]
+
+
+def manifest(*rules):
+    return {"id": "test", "segments": [{"label": f"s{i}", "colorRule": r} for i, r in enumerate(rules)]}
+
+
+def test_coverage_shadowing_and_unmatched(monkeypatch):
+    # Four pixels: red, orange, green, black
+    mask = np.array([[[250, 0, 0], [250, 150, 0], [0, 250, 0], [0, 0, 0]]], dtype=np.uint8)
+    monkeypatch.setattr(check_rules, "load_mask", lambda _manifest: mask)
+    report = analyze(manifest({"r_gt": 200}, {"g_gt": 100}))
+    assert report["errors"] == []
+    assert [(s["matched"], s["effective"]) for s in report["segments"]] == [(0.5, 0.5), (0.5, 0.25)]
+    assert report["overlaps"] == [{"first": "s0", "shadowed": "s1", "fraction": 0.25}]
+    assert report["unmatched"] == 0.25
+
+
+def test_unusable_rules_stop_before_the_mask_is_read(monkeypatch):
+    def fail(_manifest):
+        raise AssertionError("mask read")
+    monkeypatch.setattr(check_rules, "load_mask", fail)
+    report = analyze(manifest({"r_gt": "x"}))
+    assert report["errors"] == ["s0: r_gt='x' is not a number"]
+    assert report["segments"] == []
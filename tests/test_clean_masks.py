@@ -0,0 +1,47 @@
+"""Tests for snap_edges in tools/clean_masks.py."""
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from tools.clean_masks import snap_edges  # noqa: E402
+
+
+def artwork(width, edge):
+    """Dark artwork left of column ``edge``, light from it on."""
+    art = np.zeros((20, width, 3), dtype=np.float32)
+    art[:, :edge] = 40
+    art[:, edge:] = 220
+    return art
+
+
+def test_border_moves_onto_the_artwork_edge():
+    labels = np.ones((20, 20), dtype=np.uint8)
+    labels[:, 8:] = 2
+    out = snap_edges(labels, artwork(20, 10), band=3)
+    assert (out[:, :10] == 1).all()
+    assert (out[:, 10:] == 2).all()
+
+
+def test_pixels_beyond_the_band_are_kept():
+    labels = np.ones((20, 30), dtype=np.uint8)
+    labels[:, 8:] = 2
+    out = snap_edges(labels, artwork(30, 20), band=2)
+    assert (out[:, 11:] == 2).all()
+
+
+def test_unmatched_pixels_are_left_for_hole_filling():
+    labels = np.ones((20, 20), dtype=np.uint8)
+    labels[:, 8:12] = 0
+    labels[:, 12:] = 2
+    out = snap_edges(labels, artwork(20, 10), band=2)
+    assert (out[:, 8:12] == 0).all()
+
+
+def test_label_0_is_never_a_target():
+    labels = np.zeros((20, 20), dtype=np.uint8)
+    labels[:, 10:] = 1
+    # The artwork is uniform, so the unmatched region would be as good a match as any
+    out = snap_edges(labels, np.zeros((20, 20, 3), dtype=np.float32), band=3)
+    assert (out[:, 10:] == 1).all()
+    assert (out[:, :10] == 0).all()
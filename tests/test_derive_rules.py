@@ -0,0 +1,37 @@
+"""Tests for tight_rule in tools/derive_rules.py."""
+import numpy as np
+
+from tools.derive_rules import tight_rule
+from tools.masks import label_index
+
+
+def center(*rgb):
+    return np.array(rgb, dtype=np.uint8)
+
+
+def test_margin_is_below_half_the_distance_to_the_nearest_centre():
+    rule = tight_rule(center(100, 100, 100), np.array([[120, 100, 100], [0, 0, 0]], dtype=np.uint8))
+    assert rule == {"r_gt": 91, "r_lt": 109, "g_gt": 91, "g_lt": 109, "b_gt": 91, "b_lt": 109}
+
+
+def test_margin_is_capped():
+    rule = tight_rule(center(128, 128, 128), np.empty((0, 3), dtype=np.uint8))
+    assert rule == {"r_gt": 96, "r_lt": 160, "g_gt": 96, "g_lt": 160, "b_gt": 96, "b_lt": 160}
+
+
+def test_no_bound_at_the_ends_of_a_channel():
+    # Rules are strict, so r_gt 0 or r_lt 255 would drop pixels at the extremes
+    rule = tight_rule(center(32, 0, 223), np.empty((0, 3), dtype=np.uint8), max_margin=32)
+    assert "r_gt" not in rule and "g_gt" not in rule and "b_lt" not in rule
+    assert rule == {"r_lt": 64, "g_lt": 32, "b_gt": 191}
+
+
+def test_rules_never_overlap():
+    centers = np.array([[0, 0, 0], [255, 255, 255], [200, 30, 30], [190, 40, 30]], dtype=np.uint8)
+    segments = [{"label": str(i), "colorRule": tight_rule(c, np.delete(centers, i, axis=0))}
+                for i, c in enumerate(centers)]
+    # Every centre matches its own rule and no other
+    for i in range(len(centers)):
+        assert label_index(segments[i:], centers[None, i:i + 1])[0, 0] == 1
+        others = segments[:i] + segments[i + 1:]
+        assert label_index(others, centers[None, i:i + 1])[0, 0] == 0
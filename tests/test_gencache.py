@@ -0,0 +1,89 @@
+"""Tests for request keys and LRU eviction in tools/gencache.py."""
+import os
+
+from tools.gencache import CachedBackend, GenerationCache, parse_size, request_key
+
+
+def image(size):
+    return [{"mime_type": "image/png", "data": b"x" * size}]
+
+
+def test_request_key_covers_every_field():
+    base = request_key("model", "prompt", ("IMAGE",), b"img")
+    assert base == request_key("model", "prompt", ("IMAGE",), b"img", backend="gemini")
+    assert len({
+        base,
+        request_key("other", "prompt", ("IMAGE",), b"img"),
+        request_key("model", "prompt!", ("IMAGE",), b"img"),
+        request_key("model", "prompt", ("TEXT", "IMAGE"), b"img"),
+        request_key("model", "prompt", ("IMAGE",), b"img2"),
+        request_key("model", "prompt", ("IMAGE",), b"img", backend="fake"),
+    }) == 6
+
+
+def test_request_key_fields_do_not_run_together():
+    assert request_key("ab", "c", ()) != request_key("a", "bc", ())
+
+
+def test_parse_size():
+    assert parse_size("2G") == 2 * 1024 ** 3
+    assert parse_size("500m") == 500 * 1024 ** 2
+    assert parse_size("1.5KB") == 1536
+    assert parse_size("1234") == 1234
+
+
+def test_round_trip(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    parts = image(10) + [{"text": "labels"}]
+    cache.put("ab" * 32, parts, "model", "prompt", ("TEXT", "IMAGE"))
+    assert cache.get("ab" * 32) == parts
+    assert cache.get("cd" * 32) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = GenerationCache(str(tmp_path), max_bytes=250)
+    keys = ["a" * 64, "b" * 64, "c" * 64]
+    for i, key in enumerate(keys):
+        cache.put(key, image(100))
+        os.utime(os.path.join(str(tmp_path), key[:2], key, "meta.json"), (1000 + i, 1000 + i))
+    # Only two 100-byte entries fit: the oldest one went when the third was written
+    assert cache.get(keys[0]) is None
+    # A hit makes b the most recently used, so c goes next
+    assert cache.get(keys[1]) is not None
+    cache.put("d" * 64, image(100))
+    assert cache.get(keys[2]) is None
+    assert cache.get(keys[1]) is not None
+    assert sum(e[1] for e in cache.entries()) <= 250
+
+
+def test_prune_to_a_smaller_bound(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    for key in ("a" * 64, "b" * 64):
+        cache.put(key, image(100))
+    assert cache.prune(max_bytes=0) == 200
+    assert cache.entries() == []
+
+
+class CountingBackend:
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, model, prompt, modalities, image_bytes=None):
+        self.calls += 1
+        return image(4)
+
+
+def test_cached_backend_keys_by_backend_name(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    first = CachedBackend(CountingBackend(), cache)
+    first.generate("model", "prompt", ("IMAGE",))
+    first.generate("model", "prompt", ("IMAGE",))
+    assert (first.hits, first.misses, first.backend.calls) == (1, 1, 1)
+
+    other = CountingBackend()
+    other.name = "gemini"
+    second = CachedBackend(other, cache)
+    second.generate("model", "prompt", ("IMAGE",))
+    assert (second.hits, second.misses) == (0, 1)
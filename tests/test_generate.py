@@ -0,0 +1,95 @@
+"""Tests for the journal and up-to-date checks of tools/generate.py."""
+import pytest
+
+pytest.importorskip("PIL")
+
+from tools.generate import JOURNAL, FakeBackend, Job, Journal, is_up_to_date, journal_path, run  # noqa: E402
+
+
+def make_job(tmp_path, name="marsh/sky/poetry", prompt="a poem"):
+    return Job(name, "illustration", prompt, str(tmp_path / "out" / f"{name.replace('/', '_')}.png"))
+
+
+def test_journal_last_entry_wins_and_survives_reload(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.record(job="a", key="k1", status="error", error="boom", attempts=1)
+    journal.record(job="a", key="k1", status="done", attempts=2)
+    journal.record(job="b", key="k2", status="error", error="boom", attempts=1)
+    reloaded = Journal(path)
+    assert reloaded.entries["a"]["status"] == "done"
+    assert reloaded.entries["b"]["status"] == "error"
+    assert len(open(path).read().splitlines()) == 3
+
+
+def test_missing_output_is_stale(tmp_path):
+    job = make_job(tmp_path)
+    assert not is_up_to_date(job, job.key(), Journal(str(tmp_path / "j.jsonl")))
+
+
+def test_existing_output_without_journal_entry_is_kept(tmp_path):
+    job = make_job(tmp_path)
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "marsh_sky_poetry.png").write_bytes(b"hand-made")
+    journal = Journal(str(tmp_path / "j.jsonl"))
+    assert is_up_to_date(job, job.key(), journal)
+    assert run([job], None, journal) == (0, 1, 0)
+
+
+def test_journal_key_decides_for_generated_outputs(tmp_path):
+    job = make_job(tmp_path)
+    journal = Journal(str(tmp_path / "j.jsonl"))
+    assert run([job], FakeBackend(), journal) == (1, 0, 0)
+    assert is_up_to_date(job, job.key(), journal)
+
+    edited = make_job(tmp_path, prompt="another poem")
+    assert not is_up_to_date(edited, edited.key(), journal)
+    assert run([edited], FakeBackend(), journal) == (1, 0, 0)
+    assert run([edited], FakeBackend(), Journal(journal.path)) == (0, 1, 0)
+
+
+def test_failed_regeneration_is_retried(tmp_path):
+    job = make_job(tmp_path)
+    journal = Journal(str(tmp_path / "j.jsonl"))
+    run([job], FakeBackend(), journal)
+    edited = make_job(tmp_path, prompt="another poem")
+    assert run([edited], FakeBackend(fail_first=9), journal, max_attempts=1) == (0, 0, 1)
+    assert journal.entries[edited.name]["status"] == "error"
+    assert not is_up_to_date(edited, edited.key(), Journal(journal.path))
+
+
+def test_force_regenerates(tmp_path):
+    job = make_job(tmp_path)
+    journal = Journal(str(tmp_path / "j.jsonl"))
+    run([job], FakeBackend(), journal)
+    assert run([job], FakeBackend(), journal, force=True) == (1, 0, 0)
+
+
+def test_retries_transient_failures(tmp_path):
+    job = make_job(tmp_path)
+    journal = Journal(str(tmp_path / "j.jsonl"))
+    assert run([job], FakeBackend(fail_first=2), journal, base_delay=0) == (1, 0, 0)
+    assert journal.entries[job.name]["attempts"] == 3
+
+
+class BrokenBackend:
+    name = "broken"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, model, prompt, modalities, image_bytes=None):
+        self.calls += 1
+        raise RuntimeError("no GEMINI_API_KEY in the environment or ~/.env")
+
+
+def test_permanent_failures_are_not_retried(tmp_path):
+    backend = BrokenBackend()
+    journal = Journal(str(tmp_path / "j.jsonl"))
+    assert run([make_job(tmp_path)], backend, journal, base_delay=0) == (0, 0, 1)
+    assert backend.calls == 1
+
+
+def test_each_backend_has_its_own_journal():
+    assert journal_path("gemini") == JOURNAL
+    assert journal_path("fake") != JOURNAL
@@ -0,0 +1,58 @@
+"""Tests for tools/masks.py: run-length encoding and colorRule resolution."""
+import numpy as np
+import pytest
+
+from tools.masks import decode_runs, encode_runs, label_index, unique_colors
+
+
+def test_runs_round_trip():
+    labels = np.array([[0, 0, 1, 1, 1], [2, 2, 2, 0, 0]], dtype=np.uint8)
+    data = encode_runs(labels)
+    assert data == bytes([0, 2, 0, 1, 3, 0, 2, 3, 0, 0, 2, 0])
+    assert (decode_runs(data, labels.size) == labels.ravel()).all()
+
+
+def test_long_runs_are_split_at_the_u16_limit():
+    labels = np.concatenate([np.full(0xFFFF * 2 + 5, 3), [7]]).astype(np.uint8)
+    triples = np.frombuffer(encode_runs(labels), dtype=np.uint8).reshape(-1, 3)
+    lengths = triples[:, 1].astype(int) | triples[:, 2].astype(int) << 8
+    assert triples[:, 0].tolist() == [3, 3, 3, 7]
+    assert lengths.tolist() == [0xFFFF, 0xFFFF, 5, 1]
+    assert (decode_runs(encode_runs(labels), labels.size) == labels).all()
+
+
+def test_empty_runs():
+    assert encode_runs(np.zeros((0, 4), dtype=np.uint8)) == b""
+    assert decode_runs(b"", 0).size == 0
+
+
+def test_decode_rejects_wrong_size():
+    with pytest.raises(ValueError):
+        decode_runs(encode_runs(np.zeros(10, dtype=np.uint8)), 11)
+
+
+def test_label_index_first_matching_rule_wins():
+    rgb = np.array([[[250, 10, 10], [10, 250, 10], [250, 250, 10], [10, 10, 10]]], dtype=np.uint8)
+    segments = [
+        {"label": "red", "colorRule": {"r_gt": 200}},
+        {"label": "green", "colorRule": {"g_gt": 200}},
+    ]
+    assert label_index(segments, rgb).tolist() == [[1, 2, 1, 0]]
+
+
+def test_label_index_thresholds_are_strict():
+    rgb = np.array([[[100, 0, 0], [101, 0, 0]]], dtype=np.uint8)
+    assert label_index([{"label": "x", "colorRule": {"r_gt": 100}}], rgb).tolist() == [[0, 1]]
+
+
+def test_label_index_limit():
+    with pytest.raises(ValueError):
+        label_index([{"colorRule": {}}] * 255, np.zeros((1, 1, 3), dtype=np.uint8))
+
+
+def test_unique_colors_inverse():
+    rgb = np.array([[[1, 2, 3], [4, 5, 6]], [[1, 2, 3], [1, 2, 3]]], dtype=np.uint8)
+    colors, counts, inverse = unique_colors(rgb, return_inverse=True)
+    assert colors.tolist() == [[1, 2, 3], [4, 5, 6]]
+    assert counts.tolist() == [3, 1]
+    assert (colors[inverse] == rgb).all()
@@ -0,0 +1,71 @@
+"""Tests for ring tracing and Douglas-Peucker simplification in tools/trace_segments.py."""
+import numpy as np
+
+from tools.trace_segments import boundary_edges, chain_rings, ring_area, simplify, simplify_ring, simplify_rings
+
+
+def rings_of(inside):
+    return chain_rings(boundary_edges(np.asarray(inside, dtype=bool)))
+
+
+def corners(ring):
+    return {tuple(p) for p in ring.tolist()}
+
+
+def test_single_pixel_is_one_unit_square():
+    (ring,) = rings_of([[1]])
+    assert len(ring) == 4
+    assert corners(ring) == {(0, 0), (1, 0), (1, 1), (0, 1)}
+    assert ring_area(ring) == 1
+
+
+def test_rectangle_ring_follows_the_border():
+    inside = np.zeros((5, 6), dtype=bool)
+    inside[1:4, 2:5] = True
+    (ring,) = rings_of(inside)
+    assert ring_area(ring) == 9
+    assert len(ring) == 12  # one corner point per unit edge
+    assert corners(ring) >= {(2, 1), (5, 1), (5, 4), (2, 4)}
+
+
+def test_hole_gives_a_second_ring():
+    inside = np.ones((5, 5), dtype=bool)
+    inside[2, 2] = False
+    rings = sorted(rings_of(inside), key=ring_area)
+    assert [ring_area(r) for r in rings] == [1, 25]
+
+
+def test_separate_regions_give_separate_rings():
+    inside = np.zeros((3, 7), dtype=bool)
+    inside[1, 1] = inside[1, 5] = True
+    assert len(rings_of(inside)) == 2
+
+
+def test_simplify_drops_collinear_points():
+    points = np.array([[0, 0], [1, 0], [2, 0], [3, 0], [4, 0]], dtype=np.float64)
+    assert simplify(points, 0.1).tolist() == [[0, 0], [4, 0]]
+
+
+def test_simplify_keeps_points_beyond_epsilon():
+    points = np.array([[0, 0], [1, 1.5], [2, 3], [3, 1.55], [4, 0]], dtype=np.float64)
+    assert simplify(points, 0.5).tolist() == [[0, 0], [2, 3], [4, 0]]
+    # (3, 1.55) is 0.03 off its chord, (1, 1.5) exactly on it
+    assert simplify(points, 0.01).tolist() == [[0, 0], [2, 3], [3, 1.55], [4, 0]]
+
+
+def test_simplify_ring_keeps_a_square_square():
+    inside = np.zeros((12, 12), dtype=bool)
+    inside[1:11, 1:11] = True
+    (ring,) = rings_of(inside)
+    simple = simplify_ring(ring, 0.5)
+    assert corners(simple) == {(1, 1), (11, 1), (11, 11), (1, 11)}
+    assert ring_area(simple) == ring_area(ring) == 100
+
+
+def test_simplify_rings_fits_the_vertex_budget():
+    yy, xx = np.mgrid[:64, :64]
+    inside = (xx - 32) ** 2 + (yy - 32) ** 2 < 28 ** 2
+    rings = rings_of(inside)
+    out = simplify_rings(rings, 24)
+    assert sum(len(r) for r in out) <= 24
+    assert abs(ring_area(out[0]) - ring_area(rings[0])) / ring_area(rings[0]) < 0.1
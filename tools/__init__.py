@@ -0,0 +1,6 @@
+"""Offline build tools for Deep Looking.
+
+Run each tool from the repository root, e.g. ``python -m tools.compile_masks``.
+Outputs are written under ``build/`` and picked up by index.html when present;
+the viewer falls back to the raw content under ``images/`` when they are not.
+"""
@@ -0,0 +1,449 @@
+"""Incremental, parallel build of everything derived from the content tree.
+
+Targets are discovered from the tree rather than declared by hand:
+
+  generate:<job>          Gemini masks and poetry illustrations (the jobs of tools.generate)
+  diagrams                the matplotlib diagrams registered in images/**/generate_*.py
+                          scripts, rendered by tools.diagrams
+  graphs                  the knowledge graphs declared in images/**/*.graph.json,
+                          rendered by tools.knowledge_graphs
+  script:<path>           other generator scripts next to the content
+  masks:<id>, tiles:<id>, geometry:<id>
+                          per-image artifacts of compile_masks, tile_masks, trace_segments
+  derivatives, bundles, assets, precache
+                          gallery-wide artifacts of make_derivatives, build_bundles, hash_assets,
+                          make_precache
+
+Every target lists its input files (script or tool source, source images,
+manifests, lens markdown) and values (prompt text, model, command line), and
+its outputs. Edges follow from one target's outputs being another's inputs.
+After a successful run the target's fingerprint — a content hash per input
+plus a hash of its values — is stored in build/build-state.json. A target
+reruns only when an output is missing or its fingerprint differs; if an
+upstream rebuild leaves its outputs byte-identical, dependents stay up to date.
+
+A target with no record whose outputs all exist and are newer than its inputs
+is adopted as up to date; --adopt accepts every existing output as current
+(useful after a fresh checkout, where file times are arbitrary). Gemini
+targets run only with --generate; otherwise stale ones are reported and
+dependents use their current outputs. The same goes for the diagram and
+graph renderers when they fail (e.g. without Graphviz), as long as the
+files dependents need exist; SVG twins of lens images are optional inputs
+of bundles.
+
+Usage (from the repository root):
+  python -m tools.build [--dry-run] [--explain] [--jobs N] [--generate] [pattern ...]
+  python -m tools.build --list
+"""
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from tools.content import (BUILD_DIR, IMAGES_DIR, ROOT, build_dir, lens_markdown_paths, load_manifest,
+                           select_images, site_path)
+from tools.diagrams import diagram_scripts, registry
+from tools.hash_assets import file_hash
+from tools.knowledge_graphs import graph_files
+from tools.knowledge_graphs import outputs as graph_outputs
+from tools.make_derivatives import lens_videos, source_images
+from tools.masks import mask_path
+
+STATE = os.path.join(BUILD_DIR, "build-state.json")
+OUTPUT_NAME = re.compile(r"""["']([\w.-]+\.(?:png|jpe?g|webp|svg|gif|dot))["']""")
+
+
+class Target:
+    """A node of the build graph: inputs, outputs and the action that makes them."""
+
+    def __init__(self, name, inputs, outputs, action, values=None, optional_outputs=False,
+                 optional_inputs=(), optional=False):
+        self.name = name
+        self.inputs = sorted(set(inputs) | set(optional_inputs))
+        self.outputs = list(outputs)
+        self.action = action  # callable, or None when the target may not run (Gemini without --generate)
+        self.values = values or {}
+        self.optional_outputs = optional_outputs  # e.g. tiles:<id> writes nothing for small masks
+        self.optional_inputs = set(optional_inputs)  # used when present, e.g. the SVG twin of a lens image
+        self.optional = optional  # a failure leaves dependents to use the current outputs
+        self.deps = []
+        self.dependents = []
+
+
+def command(*args, cwd=ROOT):
+    """Action that runs ``python <args>`` and raises with its output on failure."""
+    def run():
+        proc = subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True)
+        if proc.returncode:
+            raise RuntimeError((proc.stdout + proc.stderr).strip()[-2000:])
+        return proc.stdout
+    return run
+
+
+def tool(name):
+    return os.path.join(ROOT, "tools", name + ".py")
+
+
+def diagram_target():
+    """All registered matplotlib diagrams, rendered together by tools.diagrams (which skips unchanged figures)."""
+    scripts = diagram_scripts()
+    outputs = [os.path.join(os.path.dirname(s), name) for s in scripts for name in registry(s)]
+    return Target("diagrams", scripts + [tool("diagrams")], outputs, command("-m", "tools.diagrams"), optional=True)
+
+
+def graph_target():
+    """All declared knowledge graphs, rendered in batches by tools.knowledge_graphs (which skips unchanged graphs)."""
+    graphs = graph_files()
+    outputs = [o for g in graphs for o in graph_outputs(g)]
+    return Target("graphs", graphs + [tool("knowledge_graphs")], outputs, command("-m", "tools.knowledge_graphs"),
+                  optional=True)
+
+
+def script_targets():
+    """One target per other generator script; outputs are the file names it writes next to itself."""
+    targets = []
+    diagrams = set(diagram_scripts())
+    for script in sorted(glob.glob(os.path.join(IMAGES_DIR, "**", "generate_*.py"), recursive=True)):
+        if script in diagrams:
+            continue
+        here = os.path.dirname(script)
+        with open(script, encoding="utf-8") as f:
+            names = sorted(set(OUTPUT_NAME.findall(f.read())))
+        outputs = [os.path.join(here, n) for n in names]
+        targets.append(Target(f"script:{site_path(script)}", [script], outputs, command(script, cwd=here),
+                              values={"argv": [site_path(script)]}))
+    return targets
+
+
+def generation_targets(ids, backend=None, journal=None):
+    """Targets for the Gemini jobs of tools.generate; runnable only when a backend is given."""
+    from tools.generate import discover_jobs, run_job
+    targets = []
+    for job in discover_jobs(ids, ["mask", "illustration"]):
+        action = (lambda job=job: run_job(job, backend, journal)) if backend else None
+        targets.append(Target(f"generate:{job.name}", job.inputs, [job.output], action,
+                              values={"model": job.model, "prompt": job.prompt, "modalities": job.modalities}))
+    return targets
+
+
+def build_targets(ids):
+    """Targets for the build/ artifacts of the viewer."""
+    targets = []
+    manifests = {image_id: load_manifest(image_id) for image_id in ids}
+    manifest_files = [os.path.join(IMAGES_DIR, i, "manifest.json") for i in ids]
+    gallery = os.path.join(IMAGES_DIR, "gallery.json")
+    per_image = []
+    for image_id, manifest in manifests.items():
+        out = build_dir(image_id)
+        common = [os.path.join(IMAGES_DIR, image_id, "manifest.json"), mask_path(manifest),
+                  tool("masks"), tool("content")]
+        per_image += [
+            Target(f"masks:{image_id}", common + [tool("compile_masks")],
+                   [os.path.join(out, "labels.json"), os.path.join(out, "labels.bin")],
+                   command("-m", "tools.compile_masks", image_id)),
+            Target(f"tiles:{image_id}", common + [tool("tile_masks")], [os.path.join(out, "tiles.json")],
+                   command("-m", "tools.tile_masks", image_id), optional_outputs=True),
+            Target(f"geometry:{image_id}", common + [tool("trace_segments")], [os.path.join(out, "geometry.json")],
+                   command("-m", "tools.trace_segments", image_id)),
+        ]
+    targets += per_image
+
+    sources = [p for m in manifests.values() for p in list(source_images(m)) + list(lens_videos(m))]
+    derivatives = Target("derivatives", sources + manifest_files + [gallery, tool("make_derivatives"), tool("content")],
+                         [os.path.join(BUILD_DIR, "derivatives.json")], command("-m", "tools.make_derivatives"))
+    markdown = [md for m in manifests.values() for _seg, _lens, md in lens_markdown_paths(m)]
+    compiled = [o for t in per_image for o in t.outputs if o.endswith(".json")]
+    vectors = [o for g in graph_files() for o in graph_outputs(g, ["svg"]) if o.endswith(".svg")]
+    bundles = Target("bundles", markdown + manifest_files + compiled + derivatives.outputs
+                     + [gallery, tool("build_bundles"), tool("content")],
+                     [os.path.join(BUILD_DIR, "gallery.json")], command("-m", "tools.build_bundles"),
+                     optional_inputs=vectors)
+    content = [p for p in glob.glob(os.path.join(IMAGES_DIR, "**", "*"), recursive=True)
+               if os.path.isfile(p) and not p.endswith((".py", ".pyc"))]
+    # Every file whose hash ends up in assets.json (or versions it), not just the index files:
+    # a repainted mask can leave labels.json identical while labels.bin changes
+    mask_files = [o for t in per_image for o in t.outputs]
+    mask_files += [p for image_id in ids for p in glob.glob(os.path.join(BUILD_DIR, image_id, "tiles", "*", "*.bin"))]
+    derivative_files = [p for p in glob.glob(os.path.join(BUILD_DIR, "derivatives", "**", "*"), recursive=True)
+                        if os.path.isfile(p)]
+    assets = Target("assets", content + mask_files + derivative_files + derivatives.outputs + bundles.outputs
+                    + [tool("hash_assets")],
+                    [os.path.join(BUILD_DIR, "assets.json")], command("-m", "tools.hash_assets"))
+    precache = Target("precache", manifest_files + bundles.outputs + assets.outputs
+                      + [gallery, os.path.join(ROOT, "index.html"), tool("make_precache")],
+                      [os.path.join(BUILD_DIR, "precache.js")], command("-m", "tools.make_precache"))
+    return targets + [derivatives, bundles, assets, precache]
+
+
+def discover(ids, backend=None, journal=None):
+    """Return all targets with dependency edges, in topological order."""
+    targets = generation_targets(ids, backend, journal) + [diagram_target(), graph_target()] + script_targets() + build_targets(ids)
+    owners = {}
+    for t in targets:
+        for out in t.outputs:
+            owners[out] = t
+    for t in targets:
+        t.deps = sorted({owners[p] for p in t.inputs if p in owners and owners[p] is not t}, key=lambda d: d.name)
+        for d in t.deps:
+            d.dependents.append(t)
+
+    order, state = [], {}
+
+    def visit(t):
+        if state.get(t.name) == "done":
+            return
+        if state.get(t.name) == "visiting":
+            raise ValueError(f"dependency cycle through {t.name}")
+        state[t.name] = "visiting"
+        for d in t.deps:
+            visit(d)
+        state[t.name] = "done"
+        order.append(t)
+
+    for t in targets:
+        visit(t)
+    return order
+
+
+def select(targets, patterns):
+    """Targets matching any pattern, plus everything they depend on."""
+    if not patterns:
+        return targets
+    chosen = set()
+
+    def add(t):
+        if t.name not in chosen:
+            chosen.add(t.name)
+            for d in t.deps:
+                add(d)
+
+    for t in targets:
+        if any(fnmatch.fnmatch(t.name, p) for p in patterns):
+            add(t)
+    return [t for t in targets if t.name in chosen]
+
+
+class State:
+    """build/build-state.json: fingerprints of built targets and a file hash cache."""
+
+    def __init__(self, path=STATE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.targets, self.files = {}, {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.targets, self.files = data.get("targets", {}), data.get("files", {})
+
+    def hash(self, path):
+        """Content hash of a file, reusing the cached one while its size and mtime are unchanged."""
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        rel = site_path(path)
+        with self.lock:
+            cached = self.files.get(rel)
+        if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+            return cached[2]
+        digest = file_hash(path, 16)
+        with self.lock:
+            self.files[rel] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def fingerprint(self, target):
+        values = json.dumps(target.values, sort_keys=True, default=list)
+        return {
+            "values": hashlib.sha256(values.encode()).hexdigest()[:16],
+            "inputs": {site_path(p): self.hash(p) for p in target.inputs},
+        }
+
+    def record(self, target, fingerprint):
+        with self.lock:
+            self.targets[target.name] = {**fingerprint, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    def save(self):
+        with self.lock:
+            data = {"targets": self.targets, "files": self.files}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+
+def stale_reasons(target, fingerprint, state, adopt=False):
+    """Why ``target`` must rebuild (empty when up to date), and whether to adopt its outputs."""
+    missing = [o for o in target.outputs if not os.path.exists(o)]
+    reasons = []
+    if missing and not target.optional_outputs:
+        more = f" (+{len(missing) - 1} more)" if len(missing) > 1 else ""
+        reasons.append(f"output missing: {site_path(missing[0])}{more}")
+    record = state.targets.get(target.name)
+    if record is None:
+        if reasons:
+            return reasons + ["never built"], False
+        existing = [o for o in target.outputs if os.path.exists(o)]
+        if not existing and not adopt:
+            return ["never built"], False
+        newest_input = max((os.path.getmtime(p) for p in target.inputs if os.path.exists(p)), default=0)
+        if adopt or all(os.path.getmtime(o) >= newest_input for o in existing):
+            return [], True
+        return ["no build record and outputs older than inputs"], False
+    if record["values"] != fingerprint["values"]:
+        reasons.append("recipe changed")
+    old, new = record["inputs"], fingerprint["inputs"]
+    for path in sorted(set(old) | set(new)):
+        if path not in old:
+            reasons.append(f"new input: {path}")
+        elif path not in new:
+            reasons.append(f"input removed: {path}")
+        elif old[path] != new[path]:
+            reasons.append(f"input {'missing' if new[path] is None else 'changed'}: {path}")
+    return reasons, False
+
+
+def blocked_by(target, dep):
+    """True when ``dep`` failing must skip ``target``.
+
+    Optional generators (diagrams, graphs) only block when an input they
+    produce is missing and not optional; otherwise their current outputs are used.
+    """
+    if not dep.optional:
+        return True
+    produced = [p for p in dep.outputs if p in target.inputs]
+    return not all(os.path.exists(p) or p in target.optional_inputs for p in produced)
+
+
+def build(targets, state, jobs=os.cpu_count(), dry_run=False, explain=False, adopt=False, verbose=False):
+    """Run stale targets as their dependencies finish; return {target name: status}."""
+    status = {}
+    remaining = {t.name: len(t.deps) for t in targets}
+    names = {t.name for t in targets}
+    ready = [t for t in targets if not remaining[t.name]]
+    running = {}
+    start = time.monotonic()
+
+    def report(t, word, reasons=(), seconds=None):
+        timing = f" ({seconds:.1f}s)" if seconds is not None else ""
+        print(f"[{word}] {t.name}{timing}")
+        if explain:
+            for r in reasons:
+                print(f"    {r}")
+
+    def finish(t, word):
+        status[t.name] = word
+        for d in t.dependents:
+            if d.name in names:
+                remaining[d.name] -= 1
+                if not remaining[d.name]:
+                    ready.append(d)
+
+    def run(t):
+        t0 = time.monotonic()
+        out = t.action()
+        if verbose and isinstance(out, str) and out.strip():
+            print(out.rstrip())
+        return time.monotonic() - t0
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while ready or running:
+            while ready:
+                t = ready.pop(0)
+                failed = [d.name for d in t.deps
+                          if status.get(d.name) in ("failed", "skipped") and blocked_by(t, d)]
+                if failed:
+                    report(t, "skipped", [f"upstream failed: {failed[0]}"])
+                    finish(t, "skipped")
+                    continue
+                fingerprint = state.fingerprint(t)
+                reasons, adopted = stale_reasons(t, fingerprint, state, adopt)
+                if dry_run:
+                    # Outputs of upstream targets that would rebuild are unknown yet
+                    reasons += [f"upstream will rebuild: {d.name}" for d in t.deps
+                                if status.get(d.name) == "would build"]
+                if not reasons:
+                    if adopted and not dry_run:
+                        state.record(t, fingerprint)
+                    if explain:
+                        report(t, "up to date", ["adopted existing outputs"] if adopted else [])
+                    finish(t, "up to date")
+                elif dry_run:
+                    report(t, "would build", reasons)
+                    finish(t, "would build")
+                elif t.action is None:
+                    report(t, "stale", reasons + ["run with --generate to call Gemini"])
+                    finish(t, "stale")
+                else:
+                    if explain:
+                        report(t, "building", reasons)
+                    running[pool.submit(run, t)] = (t, fingerprint)
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                t, fingerprint = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    report(t, "FAILED", [])
+                    print("    " + str(e).replace("\n", "\n    "))
+                    finish(t, "failed")
+                    continue
+                state.record(t, fingerprint)
+                state.save()
+                report(t, "built", [], seconds)
+                finish(t, "built")
+
+    counts = {}
+    for word in status.values():
+        counts[word] = counts.get(word, 0) + 1
+    summary = ", ".join(f"{n} {word}" for word, n in sorted(counts.items()))
+    print(f"{summary or 'nothing to do'} in {time.monotonic() - start:.1f}s")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("patterns", nargs="*",
+                        help="build only targets matching these globs (and their dependencies), e.g. 'masks:*'")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="targets run in parallel")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="list stale targets without running them")
+    parser.add_argument("--explain", action="store_true", help="print why each target is (or is not) rebuilt")
+    parser.add_argument("--list", action="store_true", help="list targets and their dependencies")
+    parser.add_argument("--generate", action="store_true", help="allow Gemini targets to run")
+    parser.add_argument("--adopt", action="store_true",
+                        help="record existing outputs of unrecorded targets as up to date")
+    parser.add_argument("--verbose", "-v", action="store_true", help="show the output of every action")
+    args = parser.parse_args()
+
+    backend = journal = None
+    if args.generate and not args.dry_run:
+        from tools.gencache import CachedBackend, GenerationCache
+        from tools.generate import GeminiBackend, Journal
+        backend, journal = CachedBackend(GeminiBackend(), GenerationCache()), Journal()
+    targets = select(discover(select_images([]), backend, journal), args.patterns)
+
+    if args.list:
+        for t in targets:
+            deps = ", ".join(d.name for d in t.deps)
+            print(f"{t.name}  ({len(t.inputs)} inputs, {len(t.outputs)} outputs){'  <- ' + deps if deps else ''}")
+        return
+
+    state = State()
+    try:
+        status = build(targets, state, args.jobs, args.dry_run, args.explain, args.adopt, args.verbose)
+    finally:
+        if not args.dry_run:
+            state.save()
+    if any(s == "failed" for s in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
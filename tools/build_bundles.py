@@ -0,0 +1,159 @@
+"""Precompile every manifest and its lens markdown into one JSON bundle per image.
+
+Without a bundle the viewer fetches gallery.json, then each manifest.json,
+then one markdown file per lens, one after another. This walks
+images/<id>/<segment>/<lens>/<segment>.md and wholeimage/<lens>/wholeimage.md
+with the same front-matter rules as parsePoemMarkdown and writes:
+
+  build/<id>/bundle.<hash>.json — the manifest plus parsed lens data, media paths
+                                  resolved (preferring an SVG twin of a lens
+                                  image), and the label map table, tile
+                                  pyramid index, segment geometry, image
+                                  derivatives and video posters if those
+                                  tools have run
+  build/gallery.json            — gallery index: titles, thumbnails, image sizes,
+                                  bundle paths
+
+Bundle names carry a hash of their content, so browsers and CDNs may cache
+them indefinitely; only build/gallery.json has to be revalidated.
+
+Usage (from the repository root):
+  python -m tools.build_bundles [id ...]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+from tools.content import (BUILD_DIR, build_dir, image_dir, lens_markdown_paths, load_manifest,
+                           parse_markdown, select_images, site_path)
+from tools.make_derivatives import load_derivatives
+
+
+def lens_entry(lens, md_path, derivatives):
+    """Return the lens object the viewer builds from one markdown file."""
+    with open(md_path, encoding="utf-8") as f:
+        meta = parse_markdown(f.read())
+    lens_dir = os.path.dirname(md_path)
+    entry = {
+        "lens": lens,
+        "title": meta.get("title"),
+        "poet": meta.get("poet"),
+        "url": meta.get("url"),
+        "image": site_path(os.path.join(lens_dir, meta["image"])) if meta.get("image") else "",
+        "video": site_path(os.path.join(lens_dir, meta["video"])) if meta.get("video") else "",
+        "youtube": meta.get("youtube", ""),
+        "keyword": meta.get("keyword"),
+        "text": meta["text"],
+    }
+    vector = os.path.splitext(os.path.join(lens_dir, meta["image"]))[0] + ".svg" if meta.get("image") else ""
+    if vector and os.path.exists(vector):
+        # A rendered graph with an SVG twin: show the vector, which stays sharp at any size
+        entry["image"] = site_path(vector)
+    elif entry["image"] in derivatives:
+        entry["imageVariants"] = derivatives[entry["image"]]
+    if entry["video"] in derivatives:
+        entry["videoPoster"] = derivatives[entry["video"]]
+    return entry
+
+
+def build_bundle(manifest, derivatives):
+    """Return the bundle dict for one manifest."""
+    bundle = dict(manifest)
+    root_image = site_path(os.path.join(image_dir(manifest["id"]), manifest["image"]))
+    if root_image in derivatives:
+        bundle["imageVariants"] = derivatives[root_image]
+    bundle["lensData"] = {}
+    bundle["imageLensData"] = []
+    for seg, lens, md_path in lens_markdown_paths(manifest):
+        if not os.path.exists(md_path):
+            print(f"  warning: missing {site_path(md_path)}")
+            continue
+        entry = lens_entry(lens, md_path, derivatives)
+        if seg is None:
+            bundle["imageLensData"].append(entry)
+        else:
+            bundle["lensData"].setdefault(seg["label"], []).append(entry)
+
+    # Inline the outputs of compile_masks, tile_masks and trace_segments when present
+    for key, name in (("labelMap", "labels.json"), ("labelTiles", "tiles.json"), ("geometry", "geometry.json")):
+        path = os.path.join(BUILD_DIR, manifest["id"], name)
+        if os.path.exists(path):
+            with open(path) as f:
+                bundle[key] = json.load(f)
+    return bundle
+
+
+def write_bundle(bundle):
+    """Write a bundle under its content hash, remove stale ones, return its site path."""
+    text = json.dumps(bundle, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    out_dir = build_dir(bundle["id"])
+    path = os.path.join(out_dir, f"bundle.{digest}.json")
+    for old in glob.glob(os.path.join(out_dir, "bundle.*.json")):
+        if old != path:
+            os.remove(old)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return site_path(path)
+
+
+# Gallery thumbnails are 280 CSS px wide; the fallback <img src> covers 2x displays
+THUMB_WIDTH = 560
+
+
+def thumbnail(variants):
+    """The smallest derivative at least THUMB_WIDTH wide (else the largest), or None."""
+    for sources in variants["sources"].values():
+        widths = sorted(sources)
+        return next((path for width, path in widths if width >= THUMB_WIDTH), widths[-1][1])
+    return None
+
+
+def gallery_entry(manifest, bundle, bundle_path):
+    entry = {
+        "id": manifest["id"],
+        "title": manifest["title"],
+        "image": site_path(os.path.join(image_dir(manifest["id"]), manifest["image"])),
+        "bundle": bundle_path,
+    }
+    for key in ("gallery", "galleryUrl", "imageVariants"):
+        if bundle.get(key):
+            entry[key] = bundle[key]
+    thumb = thumbnail(bundle["imageVariants"]) if bundle.get("imageVariants") else None
+    if thumb:
+        entry["thumb"] = thumb
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    args = parser.parse_args()
+
+    index_path = os.path.join(build_dir(), "gallery.json")
+    ids = select_images(args.ids)
+    derivatives = load_derivatives()
+    entries = {}
+    if args.ids and os.path.exists(index_path):
+        with open(index_path) as f:
+            entries = {e["id"]: e for e in json.load(f)["images"]}
+
+    for image_id in ids:
+        manifest = load_manifest(image_id)
+        bundle = build_bundle(manifest, derivatives)
+        path = write_bundle(bundle)
+        entries[image_id] = gallery_entry(manifest, bundle, path)
+        n_lenses = sum(len(v) for v in bundle["lensData"].values()) + len(bundle["imageLensData"])
+        print(f"{image_id}: {n_lenses} lenses -> {path} ({os.path.getsize(path):,} bytes)")
+
+    # Keep gallery.json order; drop entries for images no longer in the gallery
+    order = select_images([])
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"images": [entries[i] for i in order if i in entries]}, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {site_path(index_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Validate manifest colorRules against their segmentation masks.
+
+buildGetLabel in index.html returns the first segment whose colorRule
+matches, so overlapping rules silently shadow later segments and colours
+that match no rule become dead zones. For every image this reports:
+
+  - invalid rules (unknown keys, non-numeric thresholds or ones outside 0-255,
+    empty ranges)
+  - per segment: the fraction of the mask its rule matches, and the fraction
+    it actually receives after earlier segments have claimed their pixels
+  - pairwise overlaps between rules
+  - the unmatched fraction of the mask
+
+Rules are evaluated on each mask's palette of unique colours, weighted by
+pixel count, so the whole gallery is checked in a few seconds.
+
+Usage (from the repository root):
+  python -m tools.check_rules [--strict] [--max-unmatched 0.05] [--json] [id ...]
+"""
+import argparse
+import itertools
+import json
+import sys
+
+import numpy as np
+
+from tools.content import load_manifest, select_images
+from tools.masks import RULE_KEYS, load_mask, rule_mask, unique_colors
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_rule(rule):
+    """Return a list of problems with a single colorRule, without looking at any mask."""
+    problems = []
+    for key, value in rule.items():
+        if key not in RULE_KEYS:
+            problems.append(f"unknown key {key!r}")
+        elif not is_number(value):
+            problems.append(f"{key}={value!r} is not a number")
+        elif not 0 <= value <= 255:
+            problems.append(f"{key}={value!r} is outside 0-255")
+    for channel in "rgb":
+        gt, lt = rule.get(channel + "_gt"), rule.get(channel + "_lt")
+        if is_number(gt) and is_number(lt) and lt - gt <= 1:
+            problems.append(f"{channel}_gt={gt} and {channel}_lt={lt} leave no value")
+    if not rule:
+        problems.append("empty rule matches every pixel")
+    return problems
+
+
+def analyze(manifest):
+    """Return a report dict for one manifest."""
+    segments = manifest["segments"]
+    report = {"id": manifest["id"], "errors": [], "segments": [], "overlaps": [], "unmatched": 0.0}
+    for seg in segments:
+        for problem in validate_rule(seg["colorRule"]):
+            report["errors"].append(f"{seg['label']}: {problem}")
+    # Rules that cannot be evaluated stop here; range problems still leave a usable rule
+    rules = [seg["colorRule"] for seg in segments]
+    if any(key not in RULE_KEYS or not is_number(value) for rule in rules for key, value in rule.items()):
+        return report
+
+    colors, counts = unique_colors(load_mask(manifest))
+    total = counts.sum()
+    matches = [rule_mask(seg["colorRule"], colors) for seg in segments]
+    claimed = np.zeros(len(colors), dtype=bool)
+    for seg, match in zip(segments, matches):
+        effective = match & ~claimed
+        claimed |= match
+        report["segments"].append({
+            "label": seg["label"],
+            "matched": counts[match].sum() / total,
+            "effective": counts[effective].sum() / total,
+        })
+    for (i, a), (j, b) in itertools.combinations(enumerate(matches), 2):
+        both = counts[a & b].sum()
+        if both:
+            report["overlaps"].append({
+                "first": segments[i]["label"],
+                "shadowed": segments[j]["label"],
+                "fraction": both / total,
+            })
+    report["unmatched"] = counts[~claimed].sum() / total
+    return report
+
+
+def print_report(report):
+    print(f"{report['id']}:")
+    for error in report["errors"]:
+        print(f"  ERROR {error}")
+    for seg in report["segments"]:
+        shadowed = seg["matched"] - seg["effective"]
+        note = f"  ({shadowed:.2%} shadowed)" if shadowed > 0 else ""
+        print(f"  {seg['label']:<24} {seg['effective']:>7.2%}{note}")
+    for overlap in report["overlaps"]:
+        print(f"  overlap: {overlap['first']} shadows {overlap['shadowed']} on {overlap['fraction']:.2%}")
+    if report["segments"]:
+        print(f"  {'unmatched':<24} {report['unmatched']:>7.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--strict", action="store_true", help="also fail on rule overlaps")
+    parser.add_argument("--max-unmatched", type=float, default=None,
+                        help="fail when more than this fraction of a mask matches no rule")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args()
+
+    reports = [analyze(load_manifest(image_id)) for image_id in select_images(args.ids)]
+    if args.json:
+        print(json.dumps(reports, indent=2, default=float))
+    else:
+        for report in reports:
+            print_report(report)
+
+    failed = False
+    for report in reports:
+        failed |= bool(report["errors"])
+        failed |= args.strict and bool(report["overlaps"])
+        if args.max_unmatched is not None and report["segments"]:
+            failed |= report["unmatched"] > args.max_unmatched
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
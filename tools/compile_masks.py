@@ -0,0 +1,69 @@
+"""Compile each segmentation mask into a compact 8-bit label-index map.
+
+For every image in the gallery this reads manifest.json and its RGB
+segmentation mask, resolves every pixel to a segment with the manifest's
+colorRules (first match wins, as in index.html), and writes:
+
+  build/<id>/labels.bin   — one byte per pixel (0 = no segment, n = segments[n-1]),
+                            optionally run-length encoded
+  build/<id>/labels.json  — dimensions, encoding and the label table
+
+The viewer then resolves a hover with an array lookup instead of a canvas
+readback followed by a rule scan.
+
+Usage (from the repository root):
+  python -m tools.compile_masks [--max-size 1024] [--encoding rle|raw] [id ...]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from tools.content import build_dir, load_manifest, select_images, site_path
+from tools.masks import decode_runs, encode_runs, label_index, load_mask, mask_path, sample_nearest
+
+
+def compile_mask(manifest, max_size=1024, encoding="rle"):
+    """Write the label map for one manifest and return its metadata dict."""
+    rgb = sample_nearest(load_mask(manifest), max_size)
+    labels = label_index(manifest["segments"], rgb)
+    h, w = labels.shape
+    data = encode_runs(labels) if encoding == "rle" else labels.tobytes()
+    if encoding == "rle" and not np.array_equal(decode_runs(data, w * h), labels.ravel()):
+        raise ValueError(f"{manifest['id']}: run-length round trip does not reproduce the label map")
+
+    out_dir = build_dir(manifest["id"])
+    with open(os.path.join(out_dir, "labels.bin"), "wb") as f:
+        f.write(data)
+    meta = {
+        "width": w,
+        "height": h,
+        "encoding": encoding,
+        "data": site_path(os.path.join(out_dir, "labels.bin")),
+        "labels": [None] + [seg["label"] for seg in manifest["segments"]],
+    }
+    with open(os.path.join(out_dir, "labels.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--max-size", type=int, default=1024,
+                        help="downsample so the longest side is at most this many pixels (0 = full size)")
+    parser.add_argument("--encoding", choices=["rle", "raw"], default="rle")
+    args = parser.parse_args()
+
+    for image_id in select_images(args.ids):
+        manifest = load_manifest(image_id)
+        meta = compile_mask(manifest, args.max_size, args.encoding)
+        src_bytes = os.path.getsize(mask_path(manifest))
+        out_bytes = os.path.getsize(os.path.join(build_dir(image_id), "labels.bin"))
+        print(f"{image_id}: {meta['width']}x{meta['height']} {meta['encoding']} "
+              f"{src_bytes:,} -> {out_bytes:,} bytes ({src_bytes / max(out_bytes, 1):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
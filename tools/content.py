@@ -0,0 +1,108 @@
+"""Locate gallery content and read manifests the same way index.html does."""
+import json
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(ROOT, "images")
+BUILD_DIR = os.path.join(ROOT, "build")
+
+
+def load_gallery():
+    """Return the list of image IDs from images/gallery.json."""
+    with open(os.path.join(IMAGES_DIR, "gallery.json")) as f:
+        return json.load(f)
+
+
+def image_dir(image_id):
+    return os.path.join(IMAGES_DIR, image_id)
+
+
+def load_manifest(image_id):
+    with open(os.path.join(image_dir(image_id), "manifest.json")) as f:
+        return json.load(f)
+
+
+def build_dir(image_id=None):
+    """Return (and create) the build output directory, optionally for one image."""
+    path = BUILD_DIR if image_id is None else os.path.join(BUILD_DIR, image_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def site_path(path):
+    """Convert an absolute path inside the repo to a URL path relative to index.html."""
+    return os.path.relpath(path, ROOT).replace(os.sep, "/")
+
+
+def parse_markdown(text):
+    """Python port of parsePoemMarkdown in index.html: key: value lines, blank line, body."""
+    lines = text.split("\n")
+    meta = {}
+    body_start = 0
+    for i, line in enumerate(lines):
+        if line.strip() == "":
+            body_start = i + 1
+            break
+        colon = line.find(":")
+        if colon > 0:
+            meta[line[:colon].strip()] = line[colon + 1:].strip()
+    meta["text"] = "\n".join(lines[body_start:]).strip()
+    return meta
+
+
+def lens_markdown_paths(manifest):
+    """Yield (segment or None, lens, markdown path) for every lens the viewer loads.
+
+    Segment lenses live at <segment>/<lens>/<segment>.md and whole-image lenses
+    at wholeimage/<lens>/wholeimage.md, in manifest order.
+    """
+    base = image_dir(manifest["id"])
+    for seg in manifest["segments"]:
+        for lens in seg["lenses"]:
+            yield seg, lens, os.path.join(base, seg["dir"], lens, seg["dir"] + ".md")
+    for lens in manifest.get("imageLenses", []):
+        yield None, lens, os.path.join(base, "wholeimage", lens, "wholeimage.md")
+
+
+def select_images(ids):
+    """Return the requested image IDs, or the whole gallery when none are given."""
+    return list(ids) if ids else load_gallery()
+
+
+def _inline(value):
+    text = json.dumps(value, ensure_ascii=False, separators=(", ", ": "))
+    if isinstance(value, dict) and value:
+        text = "{ " + text[1:-1] + " }"
+    return text
+
+
+def format_manifest(manifest):
+    """Serialise a manifest in the hand-written layout used under images/.
+
+    Lists of scalars and flat objects such as colorRule stay on one line, so
+    tools that rewrite manifests produce minimal diffs.
+    """
+    inlined = []
+
+    def mark(value):
+        if isinstance(value, dict):
+            if value and all(not isinstance(v, (dict, list)) for v in value.values()):
+                inlined.append(value)
+                return f"@@{len(inlined) - 1}@@"
+            return {k: mark(v) for k, v in value.items()}
+        if isinstance(value, list):
+            if all(not isinstance(v, (dict, list)) for v in value):
+                inlined.append(value)
+                return f"@@{len(inlined) - 1}@@"
+            return [mark(v) for v in value]
+        return value
+
+    text = json.dumps(mark(manifest), indent=2, ensure_ascii=False)
+    for i, value in enumerate(inlined):
+        text = text.replace(f'"@@{i}@@"', _inline(value), 1)
+    return text + "\n"
+
+
+def write_manifest(manifest):
+    with open(os.path.join(image_dir(manifest["id"]), "manifest.json"), "w") as f:
+        f.write(format_manifest(manifest))
@@ -0,0 +1,163 @@
+"""Derive colorRules from a segmentation mask by clustering its palette.
+
+Gemini masks are flat colours only in name: after the NEAREST resize they
+still carry compression noise and anti-aliased edges. This tool
+
+  1. builds the colour histogram of the mask,
+  2. seeds one cluster per dominant colour and refines the centres with
+     k-means run on the unique colours only (weighted by pixel count),
+  3. folds secondary clusters of a segment (anti-aliased edges) into its
+     largest one,
+  4. snaps every pixel to its cluster centre and writes the cleaned mask as
+     a palette PNG (build/<id>/segmentation_mask.png, or in place with --write),
+  5. emits one tight colorRule per cluster: a box around the centre that is
+     narrower than half the distance to any other centre, so rules never overlap.
+
+Clusters are matched to the manifest's existing segments by the pixels their
+current rules claim; --update-manifest rewrites those colorRules in place
+and, since they describe the cleaned mask, requires --write.
+
+Usage (from the repository root):
+  python -m tools.derive_rules [--k N] [--write [--update-manifest]] [id ...]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from tools.content import build_dir, load_manifest, select_images, write_manifest
+from tools.masks import label_index, load_mask, mask_path, unique_colors
+
+
+def seed_centers(colors, counts, k=None, min_share=0.005, min_distance=48):
+    """Pick initial centres from the histogram: frequent colours far from each other."""
+    order = np.argsort(counts)[::-1]
+    total = counts.sum()
+    seeds = []
+    for i in order:
+        if k is None and counts[i] < min_share * total:
+            break
+        if all(np.abs(colors[i] - s).max() >= min_distance for s in seeds):
+            seeds.append(colors[i])
+            if k is not None and len(seeds) == k:
+                break
+    return np.array(seeds, dtype=np.float32)
+
+
+def kmeans(colors, counts, centers, iterations=20):
+    """Weighted Lloyd iterations over the palette; returns (centres, assignment)."""
+    weights = counts.astype(np.float64)
+    for _ in range(iterations):
+        dist = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1)
+        assign = dist.argmin(axis=1)
+        mass = np.bincount(assign, weights=weights, minlength=len(centers))
+        sums = np.stack([np.bincount(assign, weights=weights * colors[:, c], minlength=len(centers))
+                         for c in range(3)], axis=-1)
+        updated = np.where(mass[:, None] > 0, sums / np.maximum(mass, 1)[:, None], centers)
+        if np.allclose(updated, centers, atol=0.5):
+            centers = updated.astype(np.float32)
+            break
+        centers = updated.astype(np.float32)
+    dist = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1)
+    return np.rint(centers).clip(0, 255).astype(np.uint8), dist.argmin(axis=1)
+
+
+def tight_rule(center, others, max_margin=32):
+    """colorRule box around ``center`` that cannot match any colour closer to another centre."""
+    margin = max_margin
+    if len(others):
+        nearest = np.abs(others.astype(int) - center.astype(int)).max(axis=1).min()
+        margin = min(max_margin, (int(nearest) - 1) // 2)
+    margin = max(margin, 1)
+    rule = {}
+    for name, value in zip("rgb", center.tolist()):
+        # Rules are strict: r_gt 0 or r_lt 255 would exclude the channel's extreme value
+        if value - margin > 0:
+            rule[name + "_gt"] = value - margin
+        if value + margin < 255:
+            rule[name + "_lt"] = value + margin
+    return rule
+
+
+def derive(manifest, k=None):
+    """Cluster one mask; return (per-pixel cluster index, centres, list of derived segment dicts)."""
+    rgb = load_mask(manifest)
+    colors, counts, inverse = unique_colors(rgb, return_inverse=True)
+    colors = colors.astype(np.float32)
+    k = k or (len(manifest["segments"]) + 1 if manifest["segments"] else None)
+    centers, assign = kmeans(colors, counts, seed_centers(colors, counts, k))
+    clusters = assign[inverse].astype(np.uint8)
+
+    # Name each cluster after the existing segment whose rule claims most of its pixels
+    old_labels = label_index(manifest["segments"], rgb) if manifest["segments"] else np.zeros_like(clusters)
+    shares = np.bincount(clusters.ravel(), minlength=len(centers)) / clusters.size
+    names = []
+    for i in range(len(centers)):
+        votes = np.bincount(old_labels[clusters == i], minlength=len(manifest["segments"]) + 1)
+        votes[0] = 0
+        names.append(manifest["segments"][votes.argmax() - 1]["label"] if votes.any() else None)
+
+    # Fold secondary clusters of a segment (e.g. anti-aliased edges) into its largest one
+    primary = {}
+    for i in np.argsort(shares)[::-1]:
+        primary.setdefault(names[i] or ("unmatched", i), i)
+    keep = sorted(primary.values(), key=lambda i: -shares[i])
+    remap = np.array([keep.index(primary[names[i] or ("unmatched", i)]) for i in range(len(centers))],
+                     dtype=np.uint8)
+    clusters = remap[clusters]
+    centers = centers[keep]
+    shares = np.bincount(clusters.ravel(), minlength=len(centers)) / clusters.size
+
+    derived = []
+    for i, center in enumerate(centers):
+        derived.append({
+            "label": names[keep[i]],
+            "color": center.tolist(),
+            "share": round(float(shares[i]), 4),
+            "colorRule": tight_rule(center, np.delete(centers, i, axis=0)),
+        })
+    return clusters, centers, derived
+
+
+def save_quantized(clusters, centers, path):
+    """Write a snapped mask as a palette PNG (compresses far better than noisy RGB)."""
+    im = Image.fromarray(clusters)
+    im.putpalette(centers.ravel().tolist())
+    im.save(path, optimize=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--k", type=int, default=None,
+                        help="number of clusters (default: segments + 1 background, or histogram peaks)")
+    parser.add_argument("--write", action="store_true", help="overwrite the mask in images/ with the cleaned one")
+    parser.add_argument("--update-manifest", action="store_true",
+                        help="replace colorRules of matched segments in manifest.json (requires --write)")
+    args = parser.parse_args()
+    if args.update_manifest and not args.write:
+        parser.error("--update-manifest requires --write: the new rules only match the cleaned mask")
+
+    for image_id in select_images(args.ids):
+        manifest = load_manifest(image_id)
+        clusters, centers, derived = derive(manifest, args.k)
+        out = mask_path(manifest) if args.write else os.path.join(build_dir(image_id), manifest["mask"])
+        before = os.path.getsize(mask_path(manifest))
+        save_quantized(clusters, centers, out)
+        print(f"{image_id}: {len(centers)} clusters, mask {before:,} -> {os.path.getsize(out):,} bytes ({out})")
+        for d in derived:
+            print(f"  {d['label'] or '(unmatched)':<24} {tuple(d['color'])!s:<16} {d['share']:>7.2%}  "
+                  f"{json.dumps(d['colorRule'])}")
+
+        if args.update_manifest:
+            for seg in manifest["segments"]:
+                for d in derived:
+                    if d["label"] == seg["label"]:
+                        seg["colorRule"] = d["colorRule"]
+            write_manifest(manifest)
+
+
+if __name__ == "__main__":
+    main()
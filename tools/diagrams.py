@@ -0,0 +1,205 @@
+"""Render matplotlib lens diagrams across a process pool.
+
+Diagram scripts live next to their lens (images/**/generate_*.py) and
+register figure functions in a module-level dict:
+
+  DIAGRAMS = {'diagram1_cross_section.png': diagram1_cross_section, ...}
+
+Each function draws and returns a Figure; this tool saves it next to the
+script. Figures render in worker processes that import matplotlib with the
+Agg backend and draw one throwaway figure at start-up, so font and backend
+setup is paid once per worker rather than once per script.
+
+A figure is skipped when its output exists and the hash of its source is
+unchanged: the function's own code plus the script's shared code (imports,
+constants, helper functions), so editing one diagram re-renders only that
+one. Hashes and render times are kept in build/diagram-state.json, and every
+run reports per-figure render time.
+
+Usage (from the repository root):
+  python -m tools.diagrams [--jobs N] [--force] [--dry-run] [script ...]
+  python images/<...>/generate_<name>.py [--force]     (just that script's figures)
+"""
+import argparse
+import ast
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tools.content import BUILD_DIR, IMAGES_DIR, site_path
+
+STATE = os.path.join(BUILD_DIR, "diagram-state.json")
+SAVE_OPTIONS = {"bbox_inches": "tight", "facecolor": "white"}
+
+
+def registry(script):
+    """Return {output file name: function name} from a script's DIAGRAMS dict, without importing it."""
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), script)
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict)
+                and any(isinstance(t, ast.Name) and t.id == "DIAGRAMS" for t in node.targets)):
+            return {k.value: v.id for k, v in zip(node.value.keys, node.value.values)}
+    return {}
+
+
+def diagram_scripts():
+    """Every generator script under images/ that registers DIAGRAMS."""
+    scripts = glob.glob(os.path.join(IMAGES_DIR, "**", "generate_*.py"), recursive=True)
+    return [s for s in sorted(scripts) if registry(s)]
+
+
+def source_hashes(script):
+    """Return {function name: hash of its source plus the script's shared code}."""
+    with open(script, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source, script)
+    names = set(registry(script).values())
+    functions, shared = {}, []
+    for node in tree.body:
+        segment = ast.get_source_segment(source, node)
+        if isinstance(node, ast.FunctionDef) and node.name in names:
+            functions[node.name] = segment
+        elif not (isinstance(node, ast.If) and "__main__" in segment):
+            shared.append(segment)
+    shared = "\n".join(shared) + json.dumps(SAVE_OPTIONS, sort_keys=True)
+    return {name: hashlib.sha256((shared + code).encode()).hexdigest()[:16]
+            for name, code in functions.items()}
+
+
+# --- Worker side ---
+
+_modules = {}
+
+
+def _warm_up():
+    """Pool initializer: load matplotlib with Agg and render one figure to prime fonts and caches."""
+    import io
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(1, 1), dpi=50)
+    ax.text(0.5, 0.5, "warm", fontweight="bold", fontstyle="italic")
+    fig.savefig(io.BytesIO(), format="png", **SAVE_OPTIONS)
+    plt.close(fig)
+
+
+def _load(script):
+    if script not in _modules:
+        spec = importlib.util.spec_from_file_location(f"diagram_{len(_modules)}", script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[script] = module
+    return _modules[script]
+
+
+def render(script, name):
+    """Render one registered diagram next to its script; return seconds spent."""
+    import matplotlib.pyplot as plt
+    start = time.perf_counter()
+    fig = _load(script).DIAGRAMS[name]()
+    fig.savefig(os.path.join(os.path.dirname(script), name), **SAVE_OPTIONS)
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+# --- Driver ---
+
+def load_state(path=STATE):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def render_all(scripts, jobs=None, force=False, dry_run=False, state_path=STATE):
+    """Render every stale diagram of ``scripts``.
+
+    Returns ({output site path: seconds, or None when unchanged}, [site paths that failed]).
+    """
+    state = load_state(state_path)
+    tasks = []
+    results, failed = {}, []
+    for script in scripts:
+        hashes = source_hashes(script)
+        for name, function in registry(script).items():
+            out = os.path.join(os.path.dirname(script), name)
+            key = site_path(out)
+            if not force and os.path.exists(out) and state.get(key, {}).get("hash") == hashes[function]:
+                results[key] = None
+                continue
+            tasks.append((script, name, key, hashes[function]))
+
+    for script, name, key, _ in tasks:
+        print(f"{'would render' if dry_run else 'render'} {key}")
+    if dry_run or not tasks:
+        return results, failed
+
+    with ProcessPoolExecutor(max_workers=jobs or min(len(tasks), os.cpu_count()),
+                             initializer=_warm_up) as pool:
+        futures = {pool.submit(render, script, name): (key, digest) for script, name, key, digest in tasks}
+        for future in as_completed(futures):
+            key, digest = futures[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                print(f"  FAILED {key}: {e}")
+                failed.append(key)
+                continue
+            results[key] = seconds
+            state[key] = {"hash": digest, "seconds": round(seconds, 3)}
+
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    return results, failed
+
+
+def print_report(results, elapsed):
+    rendered = {k: v for k, v in results.items() if v is not None}
+    for key, seconds in sorted(rendered.items(), key=lambda kv: -kv[1]):
+        print(f"  {seconds:6.2f}s  {key}")
+    skipped = len(results) - len(rendered)
+    print(f"{len(rendered)} rendered ({sum(rendered.values()):.2f}s of render time), "
+          f"{skipped} unchanged, {elapsed:.2f}s wall")
+
+
+def render_script(script, argv=None):
+    """Entry point for a diagram script's ``__main__``: render its own diagrams.
+
+    Takes --force from the script's command line (or ``argv``).
+    """
+    parser = argparse.ArgumentParser(description=f"Render the diagrams of {os.path.basename(script)}")
+    parser.add_argument("--force", action="store_true", help="render even when the source is unchanged")
+    args = parser.parse_args(argv)
+    start = time.monotonic()
+    results, failed = render_all([os.path.abspath(script)], force=args.force)
+    print_report(results, time.monotonic() - start)
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("scripts", nargs="*", help="diagram scripts (default: every one under images/)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="render even when the source is unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="list diagrams that would render")
+    args = parser.parse_args()
+
+    scripts = [os.path.abspath(s) for s in args.scripts] or diagram_scripts()
+    start = time.monotonic()
+    results, failed = render_all(scripts, args.jobs, args.force, args.dry_run)
+    if not args.dry_run:
+        print_report(results, time.monotonic() - start)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Shared Gemini helpers for every generation script.
+
+One place for the API key lookup, a single pooled client, request caching
+(tools.gencache), saving returned images and per-call timing:
+
+    from tools import gemini
+
+    parts = gemini.generate(prompt, image_path="images/marsh/marsh.jpeg")
+    gemini.save_image(parts, "images/marsh/segmentation_mask.png", size=(w, h))
+    gemini.report()
+
+Images are sent to the API as encoded bytes and saved by writing the
+returned bytes straight to disk; PIL only decodes them when a resize or a
+format conversion is actually needed.
+"""
+import io
+import mimetypes
+import os
+import statistics
+import sys
+import threading
+import time
+
+from tools.gencache import GenerationCache, request_key
+
+MODEL = "gemini-3-pro-image-preview"
+ORIENTATION_TAG = 0x0112  # EXIF Orientation
+METRICS = []  # one dict per call: {model, seconds, cached, ok}
+
+RETRY_STATUS = (408, 429)  # plus every 5xx
+
+_client = None
+_client_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+
+
+def load_api_key():
+    """Read the Gemini API key from the environment or ~/.env."""
+    for name in ("GEMINI_API_KEY", "VITE_GEMINI_API_KEY"):
+        if os.environ.get(name):
+            return os.environ[name]
+    try:
+        with open(os.path.expanduser("~/.env")) as f:
+            for line in f:
+                for name in ("GEMINI_API_KEY=", "VITE_GEMINI_API_KEY="):
+                    if line.startswith(name):
+                        return line.strip().split("=", 1)[1]
+    except FileNotFoundError:
+        pass
+    raise RuntimeError("no GEMINI_API_KEY in the environment or ~/.env")
+
+
+class TransientError(RuntimeError):
+    """A failed call that may succeed when repeated."""
+
+
+def is_transient(error):
+    """True for failures worth retrying: rate limits, server errors, timeouts and dropped connections.
+
+    A missing key, a rejected request or a bug fails the same way every time.
+    """
+    if isinstance(error, (TransientError, ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)  # google.genai.errors.APIError carries the HTTP status
+    if isinstance(code, int):
+        return code in RETRY_STATUS or code >= 500
+    httpx = sys.modules.get("httpx")  # the transport under google-genai
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+def client():
+    """Return the process-wide genai client, creating it on first use.
+
+    Reusing one client keeps its HTTP connection pool warm across calls and
+    threads instead of paying a new TLS handshake per script or request.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            _client = genai.Client(api_key=load_api_key())
+        return _client
+
+
+def read_image(path, exif_transpose=False):
+    """Return (bytes, mime type) for an input image, applying EXIF orientation if asked.
+
+    Only images that are actually rotated or flipped (orientation other than 1)
+    are re-encoded, in their own format (JPEG at quality 95); all others are
+    sent as their original bytes.
+    """
+    mime = mimetypes.guess_type(path)[0] or "image/png"
+    if exif_transpose:
+        from PIL import Image, ImageOps
+        with Image.open(path) as im:
+            if im.getexif().get(ORIENTATION_TAG, 1) != 1:
+                # Multi-picture phone JPEGs (MPO) are sent as their primary JPEG image
+                fmt = "JPEG" if im.format in ("JPEG", "MPO") else im.format or "PNG"
+                options = {"quality": 95, "icc_profile": im.info.get("icc_profile")} if fmt == "JPEG" else {}
+                buf = io.BytesIO()
+                ImageOps.exif_transpose(im).save(buf, fmt, **options)
+                return buf.getvalue(), Image.MIME.get(fmt, mime)
+    with open(path, "rb") as f:
+        return f.read(), mime
+
+
+def _record(model, seconds, cached, ok):
+    with _metrics_lock:
+        METRICS.append({"model": model, "seconds": seconds, "cached": cached, "ok": ok})
+
+
+def generate_content(contents, modalities=("IMAGE",), model=MODEL):
+    """Call generate_content with raw contents (e.g. multi-turn) and record its latency."""
+    from google.genai import types
+    start = time.monotonic()
+    ok = False
+    try:
+        response = client().models.generate_content(
+            model=model, contents=contents,
+            config=types.GenerateContentConfig(response_modalities=list(modalities)))
+        ok = True
+        return response
+    finally:
+        _record(model, time.monotonic() - start, False, ok)
+
+
+def response_parts(response):
+    """Convert a response into plain dicts: {mime_type, data} for images, {text} for text."""
+    parts = []
+    for part in response.parts or []:
+        if part.inline_data is not None:
+            parts.append({"mime_type": part.inline_data.mime_type, "data": part.inline_data.data})
+        elif part.text:
+            parts.append({"text": part.text})
+    return parts
+
+
+def sniff_mime(data):
+    """Guess an image MIME type from its magic bytes."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def generate(prompt, image_bytes=None, image_mime=None, image_path=None, exif_transpose=False,
+             modalities=("IMAGE",), model=MODEL, cache=True):
+    """Generate from a prompt and optional input image; return a list of part dicts.
+
+    ``cache`` may be True (default on-disk cache), False, or a GenerationCache.
+    """
+    if image_path:
+        image_bytes, image_mime = read_image(image_path, exif_transpose)
+    if cache is True:
+        cache = GenerationCache()
+    key = request_key(model, prompt, modalities, image_bytes)
+    if cache:
+        start = time.monotonic()
+        parts = cache.get(key)
+        if parts is not None:
+            _record(model, time.monotonic() - start, True, True)
+            return parts
+
+    contents = [prompt]
+    if image_bytes:
+        from google.genai import types
+        contents.append(types.Part.from_bytes(data=image_bytes, mime_type=image_mime or sniff_mime(image_bytes)))
+    parts = response_parts(generate_content(contents, modalities, model))
+    if cache:
+        cache.put(key, parts, model, prompt, modalities)
+    return parts
+
+
+def first_image(parts):
+    return next((p for p in parts if p.get("data")), None)
+
+
+def texts(parts):
+    return "\n".join(p["text"] for p in parts if p.get("text"))
+
+
+def save_image(parts, path, size=None):
+    """Save the first image part to ``path``; return False if the response had no image.
+
+    When no resize is needed and the returned format matches the file
+    extension, the bytes are written as-is without a PIL decode/encode pass.
+    """
+    part = first_image(parts)
+    if part is None:
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    same_format = mimetypes.guess_type(path)[0] == part["mime_type"]
+    if size is None and same_format:
+        with open(path, "wb") as f:
+            f.write(part["data"])
+        return True
+    from PIL import Image
+    im = Image.open(io.BytesIO(part["data"]))
+    if size and im.size != size:
+        print(f"  Image is {im.size}, resizing to {size[0]}x{size[1]}")
+        im = im.resize(size, Image.NEAREST)
+    im.save(path)
+    return True
+
+
+def report():
+    """Print call counts and latency percentiles recorded so far."""
+    calls = [m for m in METRICS if not m["cached"]]
+    hits = len(METRICS) - len(calls)
+    if not calls:
+        print(f"gemini: {hits} cached, 0 API calls")
+        return
+    seconds = sorted(m["seconds"] for m in calls)
+    p95 = seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))]
+    failed = sum(not m["ok"] for m in calls)
+    print(f"gemini: {len(calls)} API calls ({failed} failed), {hits} cached; "
+          f"median {statistics.median(seconds):.1f}s, p95 {p95:.1f}s, total {sum(seconds):.1f}s")
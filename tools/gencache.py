@@ -0,0 +1,196 @@
+"""Content-addressed disk cache for generative model calls.
+
+Entries are keyed by a hash of (backend, model, prompt, response modalities,
+input image bytes) and hold the returned image and text parts. The backend
+is part of the key so responses of the offline `fake` backend of
+tools.generate can never answer a Gemini request:
+
+  <cache>/<key[:2]>/<key>/meta.json   — request summary, part list, sizes
+  <cache>/<key[:2]>/<key>/part<N>.<ext>
+
+The cache lives in $DEEPLOOKING_CACHE or ~/.cache/deeplooking/genai and is
+bounded in size: after every write the least recently used entries are
+evicted (a hit refreshes the entry's meta.json mtime).
+
+Usage (from the repository root):
+  python -m tools.gencache stats
+  python -m tools.gencache list
+  python -m tools.gencache prune [--max-bytes 1G]
+  python -m tools.gencache clear
+"""
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+DEFAULT_DIR = os.environ.get("DEEPLOOKING_CACHE", os.path.expanduser("~/.cache/deeplooking/genai"))
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def request_key(model, prompt, modalities, image_bytes=None, backend="gemini"):
+    """Stable hash identifying a generation request to one backend."""
+    digest = hashlib.sha256()
+    for part in (backend, model, prompt, ",".join(modalities)):
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(hashlib.sha256(image_bytes or b"").digest())
+    return digest.hexdigest()
+
+
+def parse_size(text):
+    """Parse sizes like 500M or 2G into bytes."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+class GenerationCache:
+    """Size-bounded LRU cache of generation responses on disk."""
+
+    def __init__(self, root=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        """Return the cached parts for ``key`` (list of {mime_type, data} / {text}), or None."""
+        meta_path = os.path.join(self._entry_dir(key), "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            parts = []
+            for part in meta["parts"]:
+                if "file" in part:
+                    with open(os.path.join(self._entry_dir(key), part["file"]), "rb") as f:
+                        parts.append({"mime_type": part["mime_type"], "data": f.read()})
+                else:
+                    parts.append({"text": part["text"]})
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(meta_path)
+        return parts
+
+    def put(self, key, parts, model="", prompt="", modalities=(), backend="gemini"):
+        """Store the parts of a response, then evict down to the size bound."""
+        os.makedirs(os.path.join(self.root, key[:2]), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.join(self.root, key[:2]))
+        stored, size = [], 0
+        for i, part in enumerate(parts):
+            if part.get("data"):
+                ext = mimetypes.guess_extension(part["mime_type"]) or ".bin"
+                name = f"part{i}{ext}"
+                with open(os.path.join(tmp, name), "wb") as f:
+                    f.write(part["data"])
+                size += len(part["data"])
+                stored.append({"mime_type": part["mime_type"], "file": name})
+            elif part.get("text"):
+                stored.append({"text": part["text"]})
+        meta = {"backend": backend, "model": model, "modalities": list(modalities), "prompt": prompt[:200],
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "bytes": size, "parts": stored}
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        with self.lock:
+            dest = self._entry_dir(key)
+            if os.path.exists(dest):
+                shutil.rmtree(dest)
+            os.replace(tmp, dest)
+            self.prune()
+
+    def entries(self):
+        """Return [(last used, bytes, key, meta)] for every entry, oldest first."""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                meta_path = os.path.join(prefix_dir, key, "meta.json")
+                try:
+                    with open(meta_path) as f:
+                        meta = json.load(f)
+                    result.append((os.path.getmtime(meta_path), meta.get("bytes", 0), key, meta))
+                except (OSError, ValueError):
+                    continue
+        return sorted(result, key=lambda e: e[0])
+
+    def prune(self, max_bytes=None):
+        """Evict least recently used entries until the cache fits; return bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        freed = 0
+        for _used, size, key, _meta in entries:
+            if total - freed <= limit:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            try:
+                os.rmdir(os.path.join(self.root, key[:2]))
+            except OSError:
+                pass  # other entries share this prefix
+            freed += size
+        return freed
+
+
+class CachedBackend:
+    """Wrap a generation backend so identical requests are answered from the cache.
+
+    Entries are keyed by the backend's ``name`` as well as the request.
+    """
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.hits = self.misses = 0
+
+    def generate(self, model, prompt, modalities, image_bytes=None):
+        name = self.backend.name
+        key = request_key(model, prompt, modalities, image_bytes, backend=name)
+        parts = self.cache.get(key)
+        if parts is not None:
+            self.hits += 1
+            return parts
+        self.misses += 1
+        parts = self.backend.generate(model, prompt, modalities, image_bytes)
+        self.cache.put(key, parts, model, prompt, modalities, backend=name)
+        return parts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("command", choices=["stats", "list", "prune", "clear"])
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="cache directory")
+    parser.add_argument("--max-bytes", default=None, help="size bound for prune, e.g. 500M (default 2G)")
+    args = parser.parse_args()
+
+    cache = GenerationCache(args.dir)
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(e[1] for e in entries)
+        print(f"{args.dir}: {len(entries)} entries, {total / 1024 ** 2:.1f} MB "
+              f"(bound {cache.max_bytes / 1024 ** 2:.0f} MB)")
+    elif args.command == "list":
+        for used, size, key, meta in cache.entries():
+            prompt = meta.get("prompt", "").splitlines()[0][:60] if meta.get("prompt") else ""
+            print(f"{key[:12]}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}  "
+                  f"{size / 1024:>8.0f} KB  {meta.get('backend', 'gemini')}/{meta.get('model', '')}  {prompt}")
+    elif args.command == "prune":
+        limit = parse_size(args.max_bytes) if args.max_bytes else None
+        print(f"Freed {cache.prune(limit) / 1024 ** 2:.1f} MB")
+    elif args.command == "clear":
+        freed = cache.prune(0)
+        print(f"Freed {freed / 1024 ** 2:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Parallel, resumable generation of segmentation masks and lens illustrations.
+
+Jobs are discovered from the content tree:
+
+  mask          build/<id>/generated/<mask>  from the root image and the image's own
+                segmentation prompt (MASK_PROMPTS, as in tests/generate_segmentation.py
+                and friends). The served mask is never replaced: review a generated
+                mask with tools.derive_rules before copying it over images/<id>/<mask>.
+  illustration  the `image:` of every poetry lens, from the poem excerpt it was first
+                generated from (POEM_EXCERPTS), else the poem text in its markdown
+
+Requests run concurrently through a bounded thread pool. Transient failures
+(rate limits, server errors, dropped connections) are retried with
+exponential backoff and full jitter; anything else fails the job at once. A job is skipped when its output exists
+and is up to date: the journal recorded the same request key (model,
+prompt, modalities and input image hash), or the output was never
+generated by this runner (existing content is kept unless --force). Every
+attempt is appended to build/generate-journal.jsonl, so an interrupted run
+resumes where it stopped. Responses are also kept in the content-addressed
+cache of tools.gencache, so a forced rerun of unchanged requests costs nothing.
+
+The backend is pluggable. `gemini` calls the Gemini API; `fake` returns
+deterministic images derived from the request key without any network, and
+by default writes under build/fake/ so it never overwrites real content. Each
+backend keeps its own journal (build/generate-journal.fake.jsonl for fake),
+whatever --out-root is.
+
+Usage (from the repository root):
+  python -m tools.generate [--backend gemini|fake] [--jobs 4] [--kind mask|illustration]
+                           [--force] [--dry-run] [id ...]
+  python -m tools.generate --backend fake --fake-latency 1 --fake-failures 2 --jobs 8
+"""
+import argparse
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image, ImageOps
+
+from tools import gemini
+from tools.content import (BUILD_DIR, ROOT, image_dir, lens_markdown_paths, load_manifest,
+                           parse_markdown, select_images, site_path)
+from tools.gencache import CachedBackend, GenerationCache, request_key
+
+MASK_PROMPT = ("Create detailed segmentation of this image. Use flat solid colors only. "
+               "Do not include any text in the produced image.")
+# Per-image mask requests: (prompt, modalities, apply EXIF orientation to the input)
+MASK_PROMPTS = {
+    "marsh": ("create detailed segmentation of this image. Use flat solid colors only. "
+              "Do not include any text in the produced image.", ("IMAGE",), False),
+    "lourmarin": (MASK_PROMPT, ("IMAGE",), False),
+    "anhinga": (
+        "Create a detailed segmentation mask of this photograph. "
+        "Identify all major regions and paint each with a distinct flat solid color. "
+        "The regions should include the anhinga bird, the grass/vegetation, "
+        "and any water/pond visible. Cover the entire image — no region should be left black. "
+        "Use flat solid colors only. Do not include any text, labels, or outlines in the image. "
+        "After generating the image, list each segment with its label, RGB color, and a colorRule "
+        "with threshold values (r_gt, r_lt, g_gt, g_lt, b_gt, b_lt) that uniquely identify that color.",
+        ("TEXT", "IMAGE"), True),
+}
+ILLUSTRATION_PROMPT = ("Create a painterly artistic illustration inspired by this poem. "
+                       "Do not include any text in the produced image.\n{text}")
+# Poem excerpts the lens illustrations were generated from, by image ID and the
+# `<id>_<keyword>` image name; the lens markdown may since have been edited
+POEM_EXCERPTS = {
+    "marsh": {
+        "boardwalk": """My breath, turned smoke, is rising on the air.
+In the background, not completely in focus,
+lies the resort itself (the sea unseen),
+a mise-en-scène of small shops, baths, hotels,
+lining the boardwalk; a few scattered figures,
+fading to haze, to blur, loom in the distance,
+early walkers like us, although it seems
+we have the boardwalk largely to ourselves.""",
+        "marsh": """Where band-neck'd partridges roost in a ring on the ground with their heads out,
+Where burial coaches enter the arch'd gates of a cemetery,
+Where winter wolves bark amid wastes of snow and icicled trees,
+Where the yellow-crown'd heron comes to the edge of the marsh at night and feeds upon small crabs,
+Where the splash of swimmers and divers cools the warm noon""",
+        "sky": """Of Chambers as the Cedars –
+Impregnable of eye –
+And for an everlasting Roof
+The Gambrels of the Sky""",
+        "water": """Water, water, every where,
+And all the boards did shrink;
+Water, water, every where,
+Nor any drop to drink""",
+    },
+    "lourmarin": {
+        "sky": """Thou on whose stream, mid the steep sky's commotion,
+Loose clouds like earth's decaying leaves are shed,
+Shook from the tangled boughs of Heaven and Ocean,""",
+        "trees": """Poems are made by fools like me,
+But only God can make a tree.""",
+        "cliffs": """a huge Cliff,
+As if with voluntary power instinct,
+Upreared its head. I struck, and struck again,
+And, growing still in stature, the huge cliff
+Rose up between me and the stars, and still
+With measured motion, like a living thing,
+Strode after me.""",
+        "meadow": """In the soft light couples pass,
+Families wander, all serene.
+On the horizon, over there,
+Is Saint Louis' dusty keep;
+High above the joyful affair,
+The sun dazzles; meadows sleep.""",
+        "river": """It is a green hollow where a river sings
+Madly catching on the grasses
+Silver rags; where the sun shines from the proud mountain:
+It is a small valley which bubbles over with rays.""",
+        "waterfall": """Sunlight streaming on Incense Stone kindles violet smoke;
+far off I watch the waterfall plunge to the long river,
+flying waters descending straight three thousand feet,
+till I think the Milky Way has tumbled from the ninth height of Heaven.""",
+        "travelers": """But the true travelers are those who go
+Only to get away: hearts like balloons,
+They never turn aside from their fatality
+And without knowing why they always say: "Let's go!\"""",
+        "bird": """A Bird came down the Walk —
+He did not know I saw —
+He bit an Angleworm in halves
+And ate the fellow, raw,""",
+    },
+}
+JOURNAL = os.path.join(BUILD_DIR, "generate-journal.jsonl")
+
+
+def journal_path(backend):
+    """The journal of a backend; a fake run must never vouch for real outputs, wherever they are written."""
+    return JOURNAL if backend == "gemini" else os.path.join(BUILD_DIR, f"generate-journal.{backend}.jsonl")
+
+
+class Job:
+    """One generation request and where its image goes."""
+
+    def __init__(self, name, kind, prompt, output, input_image=None, inputs=(), resize_to_input=False,
+                 modalities=("IMAGE",), exif_transpose=False):
+        self.name = name
+        self.kind = kind
+        self.prompt = prompt
+        self.output = output
+        self.input_image = input_image
+        self.inputs = [p for p in (input_image, *inputs) if p]
+        self.resize_to_input = resize_to_input
+        self.model = gemini.MODEL
+        self.modalities = tuple(modalities)
+        self.exif_transpose = exif_transpose
+
+    def input_bytes(self):
+        if not self.input_image:
+            return None
+        return gemini.read_image(self.input_image, self.exif_transpose)[0]
+
+    def key(self):
+        return request_key(self.model, self.prompt, self.modalities, self.input_bytes())
+
+
+def discover_jobs(ids, kinds, out_root=ROOT):
+    """Return the jobs for the given image IDs; outputs are re-rooted under ``out_root``."""
+    def out(path):
+        return os.path.join(out_root, os.path.relpath(path, ROOT))
+
+    jobs = []
+    for image_id in ids:
+        manifest = load_manifest(image_id)
+        base = image_dir(image_id)
+        root_image = os.path.join(base, manifest["image"])
+        if "mask" in kinds and not os.path.exists(root_image):
+            print(f"  warning: missing {site_path(root_image)}, skipping {image_id}/mask")
+        elif "mask" in kinds:
+            prompt, modalities, exif = MASK_PROMPTS.get(image_id, (MASK_PROMPT, ("IMAGE",), False))
+            jobs.append(Job(f"{image_id}/mask", "mask", prompt,
+                            out(os.path.join(BUILD_DIR, image_id, "generated", manifest["mask"])),
+                            input_image=root_image, resize_to_input=True,
+                            modalities=modalities, exif_transpose=exif))
+        if "illustration" not in kinds:
+            continue
+        for seg, lens, md_path in lens_markdown_paths(manifest):
+            if lens != "poetry" or not os.path.exists(md_path):
+                continue
+            with open(md_path, encoding="utf-8") as f:
+                meta = parse_markdown(f.read())
+            if not meta.get("image"):
+                continue
+            name = seg["dir"] if seg else "wholeimage"
+            keyword = os.path.splitext(meta["image"])[0].removeprefix(f"{image_id}_")
+            text = POEM_EXCERPTS.get(image_id, {}).get(keyword, meta["text"])
+            jobs.append(Job(f"{image_id}/{name}/{lens}", "illustration",
+                            ILLUSTRATION_PROMPT.format(text=text),
+                            out(os.path.join(os.path.dirname(md_path), meta["image"])),
+                            inputs=[md_path]))
+    return jobs
+
+
+class GeminiBackend:
+    """Calls the Gemini API through tools.gemini (caching is left to CachedBackend)."""
+
+    name = "gemini"
+
+    def generate(self, model, prompt, modalities, image_bytes=None):
+        return gemini.generate(prompt, image_bytes=image_bytes, modalities=modalities, model=model, cache=False)
+
+
+class FakeBackend:
+    """Deterministic offline backend: a flat-colour grid image seeded by the request key."""
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, fail_first=0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def generate(self, model, prompt, modalities, image_bytes=None):
+        key = request_key(model, prompt, modalities, image_bytes, backend=self.name)
+        with self.lock:
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+            attempt = self.attempts[key]
+        time.sleep(self.latency)
+        if attempt <= self.fail_first:
+            raise gemini.TransientError(f"fake transient failure {attempt}/{self.fail_first}")
+        rng = random.Random(key)
+        palette = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(4)]
+        im = Image.new("RGB", (8, 8))
+        im.putdata([palette[rng.randrange(4)] for _ in range(64)])
+        im = im.resize((256, 256), Image.NEAREST)
+        buf = io.BytesIO()
+        im.save(buf, "PNG")
+        return [{"mime_type": "image/png", "data": buf.getvalue()}]
+
+
+class Journal:
+    """Append-only JSONL log of job attempts; the last entry per job wins."""
+
+    def __init__(self, path=JOURNAL):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["job"]] = entry
+
+    def record(self, **entry):
+        entry["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.lock:
+            self.entries[entry["job"]] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def is_up_to_date(job, key, journal):
+    """True when the job's output exists and was generated from this request.
+
+    An output the journal has never seen is existing content (often
+    hand-tuned) and counts as up to date; only --force regenerates it. Once
+    the runner has touched a job, only a finished entry with the same key
+    counts: a failed regeneration stays stale so the next run retries it.
+    """
+    if not os.path.exists(job.output):
+        return False
+    entry = journal.entries.get(job.name)
+    if entry is None:
+        return True
+    return entry.get("status") == "done" and entry.get("key") == key
+
+
+def run_job(job, backend, journal, max_attempts=5, base_delay=2.0, max_delay=60.0):
+    """Run one job, retrying transient failures with backoff and full jitter; return elapsed seconds."""
+    key = job.key()
+    start = time.monotonic()
+    for attempt in range(1, max_attempts + 1):
+        try:
+            parts = backend.generate(job.model, job.prompt, job.modalities, job.input_bytes())
+            size = None
+            if job.resize_to_input:
+                with Image.open(job.input_image) as src:
+                    size = ImageOps.exif_transpose(src).size
+            if not gemini.save_image(parts, job.output, size):
+                # The model sometimes answers with text only; asking again usually works
+                raise gemini.TransientError("no image in response")
+            elapsed = time.monotonic() - start
+            journal.record(job=job.name, key=key, status="done", output=site_path(job.output),
+                           attempts=attempt, seconds=round(elapsed, 2))
+            return elapsed
+        except Exception as e:
+            journal.record(job=job.name, key=key, status="error", error=str(e), attempts=attempt)
+            if attempt == max_attempts or not gemini.is_transient(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            print(f"  {job.name}: attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def run(jobs, backend, journal, workers=4, force=False, dry_run=False, **retry):
+    """Run every stale job through a bounded pool; return (done, skipped, failed) counts."""
+    pending = [job for job in jobs if force or not is_up_to_date(job, job.key(), journal)]
+    skipped = len(jobs) - len(pending)
+    for job in pending:
+        print(f"{'would generate' if dry_run else 'generate'} {job.name} -> {site_path(job.output)}")
+    if dry_run or not pending:
+        return 0, skipped, 0
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, backend, journal, **retry): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                print(f"  done {job.name} in {future.result():.1f}s")
+                done += 1
+            except Exception as e:
+                print(f"  FAILED {job.name}: {e}")
+                failed += 1
+    return done, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--backend", choices=["gemini", "fake"], default="gemini")
+    parser.add_argument("--kind", action="append", choices=["mask", "illustration"],
+                        help="job kinds to run (default: both)")
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent requests")
+    parser.add_argument("--out-root", default=None,
+                        help="write outputs under this directory (default: repo root; build/fake for --backend fake)")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="seconds per fake request")
+    parser.add_argument("--fake-failures", type=int, default=0,
+                        help="transient failures per fake request before it succeeds")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the backend instead of answering repeats from tools.gencache")
+    parser.add_argument("--force", action="store_true", help="regenerate even when up to date")
+    parser.add_argument("--dry-run", action="store_true", help="list stale jobs without running them")
+    args = parser.parse_args()
+
+    out_root = args.out_root or (os.path.join(BUILD_DIR, "fake") if args.backend == "fake" else ROOT)
+    jobs = discover_jobs(select_images(args.ids), args.kind or ["mask", "illustration"], out_root)
+    if args.dry_run:
+        backend = None
+    elif args.backend == "fake":
+        backend = FakeBackend(args.fake_latency, args.fake_failures)
+    else:
+        backend = GeminiBackend()
+    if backend is not None and not args.no_cache:
+        backend = CachedBackend(backend, GenerationCache())
+
+    start = time.monotonic()
+    done, skipped, failed = run(jobs, backend, Journal(journal_path(args.backend)), args.jobs, args.force, args.dry_run)
+    print(f"{done} generated, {skipped} up to date, {failed} failed in {time.monotonic() - start:.1f}s")
+    if isinstance(backend, CachedBackend):
+        print(f"cache: {backend.hits} hits, {backend.misses} misses")
+    if args.backend == "gemini" and not args.dry_run:
+        gemini.report()
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
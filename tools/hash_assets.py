@@ -0,0 +1,66 @@
+"""Write build/assets.json: a content hash for every file the viewer may request.
+
+index.html looks each URL up in this map and requests `path?v=<hash>`, so
+unchanged files are served from the browser or CDN cache while edited files
+get a new URL immediately. This replaces the `?t=Date.now()` cache-busting,
+which made every visit re-download every manifest and markdown file.
+
+Every file under images/ is hashed, but of build/ only what the viewer
+requests by URL: image derivatives and compiled label maps. The entry points
+(build/gallery.json, build/assets.json) are always revalidated, bundles carry
+their hash in the file name, mask tiles are versioned as a whole pyramid by
+the `version` of their tiles.json, and the rest of build/ (build state,
+journals, benchmark results, test screenshots) is never served.
+
+Usage (from the repository root):
+  python -m tools.hash_assets
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from tools.content import BUILD_DIR, IMAGES_DIR, build_dir, site_path
+
+SERVED_BUILD = re.compile(r"build/(derivatives/.+|[^/]+/labels\.(json|bin))")
+SKIPPED_SUFFIXES = (".py", ".pyc")
+
+
+def file_hash(path, length=10):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def collect_hashes(roots=(IMAGES_DIR, BUILD_DIR)):
+    """Return {site path: hash} for every servable file under ``roots``."""
+    hashes = {}
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith((".", "__")))
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                rel = site_path(path)
+                if name.startswith(".") or name.endswith(SKIPPED_SUFFIXES):
+                    continue
+                if rel.startswith("build/") and not SERVED_BUILD.fullmatch(rel):
+                    continue
+                hashes[rel] = file_hash(path)
+    return hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.parse_args()
+    hashes = collect_hashes()
+    path = os.path.join(build_dir(), "assets.json")
+    with open(path, "w") as f:
+        json.dump(hashes, f, separators=(",", ":"), sort_keys=True)
+    print(f"Hashed {len(hashes)} files -> {site_path(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Render knowledge graphs declared as data with Graphviz, in batches.
+
+A knowledge graph lives next to its lens as <name>.graph.json:
+
+  name            — the digraph name
+  graph, node, edge
+                  — graph attributes and node/edge defaults
+  nodes           — [{"id": ..., <attributes>}] for nodes that need their own style
+  ranks           — lists of node ids to lay out on the same row, top to bottom
+  edges           — [{"from": ..., "to": ..., <attributes>}]
+
+For every graph this writes <name>.dot (the generated Graphviz source) and
+renders <name>.png (at --dpi) and <name>.svg next to it; the viewer shows the
+SVG when there is one. The .dot is written even when Graphviz is missing.
+
+A graph is skipped when its outputs exist and the hash of its DOT source,
+formats and dpi is unchanged (kept in build/graph-state.json). On a fresh
+checkout, without that state, committed outputs next to a .dot identical to
+the generated source are adopted, so Graphviz is only needed to re-render
+graphs that actually changed. Stale graphs
+are split into one chunk per worker. With pygraphviz installed each worker
+process lays out its graphs in-process, once per graph for all formats;
+otherwise each chunk is rendered by a single `dot -O` invocation per format.
+Either way the process start-up cost is paid per chunk, not per graph.
+
+Usage (from the repository root):
+  python -m tools.knowledge_graphs [--jobs N] [--force] [--dry-run] [--formats png,svg] [graph.json ...]
+"""
+import argparse
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tools.content import BUILD_DIR, IMAGES_DIR, site_path
+
+STATE = os.path.join(BUILD_DIR, "graph-state.json")
+SUFFIX = ".graph.json"
+FORMATS = ("png", "svg")
+DPI = 150
+BARE_ID = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|-?(?:\.\d+|\d+(?:\.\d*)?)")
+KEYWORDS = {"node", "edge", "graph", "digraph", "subgraph", "strict"}
+
+
+def graph_files():
+    return sorted(glob.glob(os.path.join(IMAGES_DIR, "**", "*" + SUFFIX), recursive=True))
+
+
+def stem(path):
+    return path[:-len(SUFFIX)]
+
+
+def outputs(path, formats=FORMATS):
+    """Return the .dot file and the rendered files of one graph."""
+    return [stem(path) + ".dot"] + [f"{stem(path)}.{fmt}" for fmt in formats]
+
+
+def quote(value):
+    """Format a DOT id: bare when that is unambiguous, otherwise a quoted string."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    value = str(value)
+    if BARE_ID.fullmatch(value) and value.lower() not in KEYWORDS:
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def attributes(attrs, skip=()):
+    items = [f"{k}={quote(v)}" for k, v in attrs.items() if k not in skip]
+    return f" [{', '.join(items)}]" if items else ""
+
+
+def to_dot(graph):
+    """Return the Graphviz source of a graph dict."""
+    lines = [f"digraph {quote(graph['name'])} {{"]
+    lines += [f"    {k}={quote(v)};" for k, v in graph.get("graph", {}).items()]
+    for kind in ("node", "edge"):
+        if graph.get(kind):
+            lines.append(f"    {kind}{attributes(graph[kind])};")
+    lines += [f"    {quote(n['id'])}{attributes(n, skip=('id',))};" for n in graph.get("nodes", [])]
+    lines += ["    { rank=same; " + " ".join(f"{quote(n)};" for n in rank) + " }" for rank in graph.get("ranks", [])]
+    lines += [f"    {quote(e['from'])} -> {quote(e['to'])}{attributes(e, skip=('from', 'to'))};"
+              for e in graph.get("edges", [])]
+    return "\n".join(lines + ["}", ""])
+
+
+def graph_hash(dot, formats, dpi):
+    return hashlib.sha256(json.dumps([dot, sorted(formats), dpi]).encode()).hexdigest()[:16]
+
+
+def is_current(path, dot, formats, recorded, digest):
+    """True when every output of a graph exists and was rendered from ``dot``.
+
+    Without a record (a fresh checkout: the state lives in build/) the
+    committed .dot stands in for it: renders are written together with their
+    .dot, so outputs next to an identical .dot are current and need no Graphviz.
+    A failed render is recorded as such and never adopted this way.
+    """
+    if not all(map(os.path.exists, outputs(path, formats))):
+        return False
+    if recorded is not None:
+        return recorded == digest
+    with open(stem(path) + ".dot", encoding="utf-8") as f:
+        return f.read() == dot
+
+
+def load_state(path=STATE):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def chunks(items, n):
+    """Split ``items`` into at most ``n`` contiguous, nearly equal chunks."""
+    size = -(-len(items) // n)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# --- Renderers; each takes a chunk of .dot files and renders every format next to them ---
+
+def _render_pygraphviz(dot_files, formats, dpi):
+    """Worker process: lay out each graph once in-process and draw it in every format."""
+    import pygraphviz
+    for dot_file in dot_files:
+        graph = pygraphviz.AGraph(dot_file)
+        graph.layout(prog="dot")
+        for fmt in formats:
+            graph.draw(f"{dot_file[:-len('.dot')]}.{fmt}", format=fmt,
+                       args=f"-Gdpi={dpi}" if fmt == "png" else "")
+
+
+def _render_dot(dot_files, formats, dpi):
+    """Run one ``dot -O`` per format over the whole chunk, then drop the .dot infix from the names."""
+    for fmt in formats:
+        args = ["dot", f"-T{fmt}", "-O"] + ([f"-Gdpi={dpi}"] if fmt == "png" else [])
+        proc = subprocess.run(args + dot_files, capture_output=True, text=True)
+        if proc.returncode:
+            raise RuntimeError(proc.stderr.strip())
+        for dot_file in dot_files:
+            os.replace(f"{dot_file}.{fmt}", f"{dot_file[:-len('.dot')]}.{fmt}")
+
+
+def renderer():
+    """Return (name, render function, executor class) for the best available Graphviz binding."""
+    if importlib.util.find_spec("pygraphviz"):
+        return "pygraphviz", _render_pygraphviz, ProcessPoolExecutor
+    if shutil.which("dot"):
+        return "dot", _render_dot, ThreadPoolExecutor
+    raise RuntimeError("Graphviz not found: install pygraphviz, or put `dot` on the PATH")
+
+
+def render_all(paths, jobs=None, force=False, dry_run=False, formats=FORMATS, dpi=DPI, state_path=STATE):
+    """Write and render every stale graph of ``paths``.
+
+    Returns ({site path: True when rendered, False when unchanged}, [site paths that failed]).
+    """
+    state = load_state(state_path)
+    stale = []
+    results, failed = {}, []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            dot = to_dot(json.load(f))
+        key = site_path(path)
+        digest = graph_hash(dot, formats, dpi)
+        if not force and is_current(path, dot, formats, state.get(key), digest):
+            state[key] = digest
+            results[key] = False
+            continue
+        stale.append((path, key, dot, digest))
+        print(f"{'would render' if dry_run else 'render'} {key}")
+    if dry_run:
+        return results, failed
+    if stale:
+        failed = render_stale(stale, jobs, formats, dpi, state, results)
+
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    return results, failed
+
+
+def render_stale(stale, jobs, formats, dpi, state, results):
+    """Render ``stale`` graphs in batches, recording each in ``state`` and ``results``; returns the failures."""
+    # The DOT source is written first so it stays in sync even where Graphviz is missing
+    for path, _, dot, _ in stale:
+        with open(stem(path) + ".dot", "w", encoding="utf-8") as f:
+            f.write(dot)
+    name, render, executor = renderer()
+    batches = chunks(stale, jobs or min(len(stale), os.cpu_count()))
+    print(f"{len(stale)} graphs in {len(batches)} batches ({name})")
+    failed = []
+    with executor(max_workers=len(batches)) as pool:
+        futures = [(pool.submit(render, [stem(p) + ".dot" for p, *_ in batch], list(formats), dpi), batch)
+                   for batch in batches]
+        for future, batch in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"  FAILED {', '.join(key for _, key, *_ in batch)}: {e}")
+                failed += [key for _, key, *_ in batch]
+                for _, key, *_ in batch:
+                    state[key] = "failed"
+                continue
+            for _, key, _, digest in batch:
+                results[key] = True
+                state[key] = digest
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("graphs", nargs="*", help=f"*{SUFFIX} files (default: every one under images/)")
+    parser.add_argument("--jobs", type=int, default=None, help="batches rendered in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="render even when the graph is unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="list graphs that would render")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma-separated output formats")
+    parser.add_argument("--dpi", type=int, default=DPI, help="resolution of raster formats")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(p) for p in args.graphs] or graph_files()
+    start = time.monotonic()
+    try:
+        results, failed = render_all(paths, args.jobs, args.force, args.dry_run, args.formats.split(","), args.dpi)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    if not args.dry_run:
+        rendered = sum(results.values())
+        print(f"{rendered} rendered, {len(results) - rendered} unchanged, "
+              f"{len(failed)} failed, {time.monotonic() - start:.2f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
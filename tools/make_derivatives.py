@@ -0,0 +1,183 @@
+"""Generate responsive, modern-format derivatives of root and lens images.
+
+The gallery shows each full root image (anhinga.jpeg is 2.5 MB) in a 280 px
+card and popups show 1-2 MB generated PNGs in a 320 px column. For every
+root image and every lens image referenced by a markdown file this writes
+downsized copies at several widths in WebP (and AVIF with --avif), plus a
+copy at its own width when it is narrower than the largest of them, under
+build/derivatives/, mirroring the path of the original, and records them in
+build/derivatives.json:
+
+  {"images/marsh/marsh.jpeg": {"width": 4032, "height": 3024,
+                               "sources": {"image/webp": [[320, "build/derivatives/..."], ...]}}}
+
+tools/build_bundles.py copies these records into the gallery index and
+bundles as `imageVariants`; the viewer turns them into srcset/sizes and
+keeps the original only for the lightbox. Existing derivatives newer than
+their source are reused.
+
+Every record also carries a `placeholder`: a 16 px wide WebP as a data URI
+(a few hundred bytes) that popups show, scaled up, while the real image
+decodes. Lens videos get a record too: a WebP poster frame and its
+placeholder, with the video's width and height, so a popup can reserve its
+space and show a still before the video starts. Poster frames need ffmpeg
+on the PATH; without it videos are skipped with a warning.
+
+Usage (from the repository root):
+  python -m tools.make_derivatives [--avif] [--widths 320,640,1280,2048] [id ...]
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from PIL import Image, ImageOps
+
+from tools.content import (BUILD_DIR, ROOT, build_dir, image_dir, lens_markdown_paths, load_manifest,
+                           parse_markdown, select_images, site_path)
+
+DEFAULT_WIDTHS = (320, 640, 1280, 2048)
+FORMATS = {"image/avif": ("avif", "AVIF", {"quality": 55}),
+           "image/webp": ("webp", "WEBP", {"quality": 80, "method": 6})}
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+PLACEHOLDER_WIDTH = 16
+POSTER_TIME = 0.5  # seconds into the video; the first frame is often black
+
+
+def source_images(manifest):
+    """Yield absolute paths of the root image and every existing lens image of a manifest."""
+    yield os.path.join(image_dir(manifest["id"]), manifest["image"])
+    for _seg, _lens, md_path in lens_markdown_paths(manifest):
+        if not os.path.exists(md_path):
+            continue
+        with open(md_path, encoding="utf-8") as f:
+            name = parse_markdown(f.read()).get("image")
+        if name and name.lower().endswith(IMAGE_SUFFIXES):
+            yield os.path.join(os.path.dirname(md_path), name)
+
+
+def lens_videos(manifest):
+    """Yield absolute paths of every existing lens video of a manifest."""
+    for _seg, _lens, md_path in lens_markdown_paths(manifest):
+        if not os.path.exists(md_path):
+            continue
+        with open(md_path, encoding="utf-8") as f:
+            name = parse_markdown(f.read()).get("video")
+        if name and os.path.exists(os.path.join(os.path.dirname(md_path), name)):
+            yield os.path.join(os.path.dirname(md_path), name)
+
+
+def derivative_path(src, width, ext):
+    stem = os.path.splitext(os.path.relpath(src, ROOT))[0]
+    return os.path.join(BUILD_DIR, "derivatives", f"{stem}.{width}.{ext}")
+
+
+def make_derivatives(src, widths, mime_types):
+    """Write the derivatives of one image and return its derivatives.json record."""
+    with Image.open(src) as im:
+        # Browsers honour EXIF orientation on the original, so bake it into the copies
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+        w, h = im.size
+        targets = [tw for tw in widths if tw < w]
+        if w <= max(widths):
+            # Otherwise srcset would top out below the image's own width
+            targets.append(w)
+        record = {"width": w, "height": h, "sources": {}}
+        for mime in mime_types:
+            ext, fmt, options = FORMATS[mime]
+            entries = []
+            for tw in targets:
+                out = derivative_path(src, tw, ext)
+                if not (os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(src)):
+                    os.makedirs(os.path.dirname(out), exist_ok=True)
+                    th = max(1, round(h * tw / w))
+                    im.resize((tw, th), Image.LANCZOS).save(out, fmt, **options)
+                entries.append([tw, site_path(out)])
+            record["sources"][mime] = entries
+        record["placeholder"] = placeholder(im)
+    return record
+
+
+def placeholder(im):
+    """A PLACEHOLDER_WIDTH wide WebP of an image as a data URI; transparency is kept."""
+    w, h = im.size
+    if im.mode not in ("RGB", "RGBA"):
+        im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+    small = im.resize((PLACEHOLDER_WIDTH, max(1, round(h * PLACEHOLDER_WIDTH / w))), Image.BOX)
+    buf = io.BytesIO()
+    small.save(buf, "WEBP", quality=40)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def make_poster(src):
+    """Write the poster frame of one video and return its derivatives.json record (None without ffmpeg)."""
+    out = derivative_path(src, "poster", "webp")
+    if not (os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(src)):
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            return None
+        with tempfile.TemporaryDirectory() as tmp:
+            frame = os.path.join(tmp, "frame.png")
+            for seek in (POSTER_TIME, 0):  # clips shorter than POSTER_TIME have no frame there
+                subprocess.run([ffmpeg, "-v", "error", "-y", "-ss", str(seek), "-i", src, "-frames:v", "1", frame],
+                               check=True)
+                if os.path.exists(frame):
+                    break
+            with Image.open(frame) as im:
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                im.convert("RGB").save(out, "WEBP", **FORMATS["image/webp"][2])
+    with Image.open(out) as im:
+        return {"width": im.width, "height": im.height, "poster": site_path(out), "placeholder": placeholder(im)}
+
+
+def load_derivatives():
+    """Return build/derivatives.json, or {} before the tool has run."""
+    path = os.path.join(BUILD_DIR, "derivatives.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--widths", default=",".join(map(str, DEFAULT_WIDTHS)),
+                        help="comma-separated target widths in pixels")
+    parser.add_argument("--avif", action="store_true", help="also write AVIF (slower to encode)")
+    args = parser.parse_args()
+    widths = sorted(int(w) for w in args.widths.split(","))
+    mime_types = (["image/avif"] if args.avif else []) + ["image/webp"]
+
+    records = load_derivatives() if args.ids else {}
+    for image_id in select_images(args.ids):
+        for src in source_images(load_manifest(image_id)):
+            rel = site_path(src)
+            if not os.path.exists(src):
+                print(f"  warning: missing {rel}")
+                continue
+            records[rel] = make_derivatives(src, widths, mime_types)
+            smallest = records[rel]["sources"]["image/webp"][0]
+            print(f"{rel}: {os.path.getsize(src):,} bytes -> "
+                  f"{os.path.getsize(os.path.join(ROOT, smallest[1])):,} at {smallest[0]}w")
+        for src in lens_videos(load_manifest(image_id)):
+            rel = site_path(src)
+            record = make_poster(src)
+            if record is None:
+                print(f"  warning: ffmpeg not found, no poster for {rel}")
+                continue
+            records[rel] = record
+            print(f"{rel}: poster {record['width']}x{record['height']} -> {record['poster']}")
+
+    with open(os.path.join(build_dir(), "derivatives.json"), "w") as f:
+        json.dump(records, f, indent=1, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
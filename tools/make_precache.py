@@ -0,0 +1,121 @@
+"""Write build/precache.js: the precache list of the service worker (sw.js).
+
+Kiosks run the gallery on flaky Wi-Fi, so sw.js keeps the app working from
+local storage. It imports this file at install and precaches every URL in
+it, exactly as index.html requests them (with the `?v=<hash>` of
+build/assets.json where there is one):
+
+  shell      index.html, the gallery index, the asset hash map
+  manifests  images/gallery.json, every manifest.json and bundle, and the
+             compiled label maps the viewer fetches when opening an image
+
+With --media the root images, their derivatives, the masks and every lens
+image and video are precached too, so a freshly installed kiosk works offline
+before anyone has opened an image. Without it those are cached at runtime
+(lens content stale-while-revalidate, large media in a size-capped cache).
+
+The list carries a version hash of everything in it; when any entry changes
+the worker installs a new precache and drops the old one. Run this after
+build_bundles and hash_assets.
+
+Usage (from the repository root):
+  python -m tools.make_precache [--media]
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from tools.content import (BUILD_DIR, IMAGES_DIR, ROOT, build_dir, image_dir, lens_markdown_paths, load_gallery,
+                           load_manifest, site_path)
+from tools.hash_assets import file_hash
+from tools.make_derivatives import lens_videos, load_derivatives, source_images
+
+SHELL = ["index.html", "build/gallery.json", "build/assets.json"]
+
+
+def load_json(path, default=None):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return default
+
+
+def versioned(path, hashes):
+    """The URL index.html requests for a site path: path?v=<hash> when the path is hashed."""
+    return f"{path}?v={hashes[path]}" if path in hashes else path
+
+
+def manifest_paths(image_id, entry):
+    """Site paths the viewer fetches to open one image, before any media."""
+    paths = [site_path(os.path.join(image_dir(image_id), "manifest.json"))]
+    if entry and entry.get("bundle"):
+        paths.append(entry["bundle"])
+        bundle = load_json(os.path.join(ROOT, entry["bundle"]), {})
+        if bundle.get("labelMap"):
+            paths.append(bundle["labelMap"]["data"])
+    else:
+        paths += [site_path(md) for _seg, _lens, md in lens_markdown_paths(load_manifest(image_id))
+                  if os.path.exists(md)]
+    return paths
+
+
+def media_paths(manifest, derivatives):
+    """Site paths of every image, derivative, mask, lens video and poster of one manifest."""
+    paths = []
+    for src in source_images(manifest):
+        path = site_path(src)
+        if os.path.exists(src):
+            paths.append(path)
+        for variants in derivatives.get(path, {}).get("sources", {}).values():
+            paths += [p for _width, p in variants]
+    mask = os.path.join(image_dir(manifest["id"]), manifest["mask"])
+    if os.path.exists(mask):
+        paths.append(site_path(mask))
+    for video in lens_videos(manifest):
+        path = site_path(video)
+        paths.append(path)
+        if derivatives.get(path, {}).get("poster"):
+            paths.append(derivatives[path]["poster"])
+    return paths
+
+
+def precache_list(media=False):
+    """Return the {version, urls} dict for sw.js."""
+    hashes = load_json(os.path.join(BUILD_DIR, "assets.json"), {})
+    index = {e["id"]: e for e in load_json(os.path.join(BUILD_DIR, "gallery.json"), {"images": []})["images"]}
+    derivatives = load_derivatives()
+    paths = [p for p in SHELL if os.path.exists(os.path.join(ROOT, p))]
+    paths.append(site_path(os.path.join(IMAGES_DIR, "gallery.json")))
+    for image_id in load_gallery():
+        paths += manifest_paths(image_id, index.get(image_id))
+        if media:
+            paths += media_paths(load_manifest(image_id), derivatives)
+
+    urls = list(dict.fromkeys(versioned(p, hashes) for p in paths))
+    # Unversioned entries (the shell, bundles) change the version through their content
+    digest = hashlib.sha256()
+    for url in urls:
+        digest.update(url.encode())
+        if "?v=" not in url:
+            digest.update(file_hash(os.path.join(ROOT, url)).encode())
+    return {"version": digest.hexdigest()[:12], "urls": urls}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--media", action="store_true",
+                        help="also precache images, derivatives, masks and videos for offline kiosks")
+    args = parser.parse_args()
+
+    precache = precache_list(args.media)
+    path = os.path.join(build_dir(), "precache.js")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("// Generated by tools/make_precache.py; imported by sw.js\n")
+        f.write(f"self.PRECACHE = {json.dumps(precache, indent=1)};\n")
+    size = sum(os.path.getsize(os.path.join(ROOT, u.split("?")[0])) for u in precache["urls"])
+    print(f"{len(precache['urls'])} URLs ({size:,} bytes), version {precache['version']} -> {site_path(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Load segmentation masks as NumPy arrays and evaluate manifest colorRules.
+
+Rules follow buildGetLabel in index.html: every present threshold must hold
+(strict inequalities) and the first matching segment wins.
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+from tools.content import image_dir
+
+RULE_KEYS = {
+    "r_gt": (0, np.greater), "r_lt": (0, np.less),
+    "g_gt": (1, np.greater), "g_lt": (1, np.less),
+    "b_gt": (2, np.greater), "b_lt": (2, np.less),
+}
+
+
+def mask_path(manifest):
+    return os.path.join(image_dir(manifest["id"]), manifest["mask"])
+
+
+def load_mask(manifest):
+    """Return the mask of a manifest as an (H, W, 3) uint8 array."""
+    with Image.open(mask_path(manifest)) as im:
+        return np.asarray(im.convert("RGB"))
+
+
+def unique_colors(rgb, return_inverse=False):
+    """Return the distinct colours of an (H, W, 3) array as (N, 3) uint8 plus pixel counts.
+
+    Evaluating rules on the palette instead of every pixel keeps whole-gallery
+    passes fast: masks have millions of pixels but only thousands of colours.
+    With ``return_inverse`` each pixel's (H, W) palette index is returned too.
+    """
+    packed = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+    values, *inverse, counts = np.unique(packed.ravel(), return_inverse=return_inverse, return_counts=True)
+    colors = np.stack([(values >> 16) & 0xFF, (values >> 8) & 0xFF, values & 0xFF], axis=-1).astype(np.uint8)
+    if return_inverse:
+        return colors, counts, inverse[0].reshape(rgb.shape[:2])
+    return colors, counts
+
+
+def rule_mask(rule, rgb):
+    """Boolean array that is True where the pixels of ``rgb`` satisfy ``rule``."""
+    match = np.ones(rgb.shape[:-1], dtype=bool)
+    for key, value in rule.items():
+        channel, op = RULE_KEYS[key]
+        match &= op(rgb[..., channel], value)
+    return match
+
+
+def label_index(segments, rgb):
+    """Map each pixel to 1 + index of its first matching segment, or 0 for none."""
+    if len(segments) > 254:
+        raise ValueError("at most 254 segments fit in an 8-bit label map")
+    labels = np.zeros(rgb.shape[:-1], dtype=np.uint8)
+    unassigned = np.ones(rgb.shape[:-1], dtype=bool)
+    for i, seg in enumerate(segments):
+        hit = unassigned & rule_mask(seg["colorRule"], rgb)
+        labels[hit] = i + 1
+        unassigned &= ~hit
+    return labels
+
+
+def sample_nearest(arr, max_size):
+    """Nearest-neighbour downsample so the longest side is at most ``max_size``."""
+    h, w = arr.shape[:2]
+    scale = max(h, w) / max_size if max_size else 1
+    if scale <= 1:
+        return arr
+    h2, w2 = max(1, round(h / scale)), max(1, round(w / scale))
+    ys = ((np.arange(h2) + 0.5) * h / h2).astype(np.intp)
+    xs = ((np.arange(w2) + 0.5) * w / w2).astype(np.intp)
+    return arr[ys[:, None], xs[None, :]]
+
+
+def encode_runs(labels):
+    """Run-length encode a label map as (label:u8, length:u16le) triples in row-major order."""
+    flat = labels.ravel()
+    if flat.size == 0:
+        return b""
+    starts = np.flatnonzero(np.diff(flat)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.concatenate((starts, [flat.size])))
+    values = flat[starts]
+    # Split runs longer than the u16 limit into several triples
+    reps = (lengths + 0xFFFF - 1) // 0xFFFF
+    values = np.repeat(values, reps)
+    chunks = np.full(reps.sum(), 0xFFFF, dtype=np.int64)
+    last = np.cumsum(reps) - 1
+    chunks[last] = lengths - (reps - 1) * 0xFFFF
+    out = np.empty((values.size, 3), dtype=np.uint8)
+    out[:, 0] = values
+    out[:, 1] = chunks & 0xFF
+    out[:, 2] = chunks >> 8
+    return out.tobytes()
+
+
+def decode_runs(data, size):
+    """Inverse of encode_runs, used to verify what the viewer will decode."""
+    triples = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+    lengths = triples[:, 1].astype(np.int64) | (triples[:, 2].astype(np.int64) << 8)
+    flat = np.repeat(triples[:, 0], lengths)
+    if flat.size != size:
+        raise ValueError(f"run lengths sum to {flat.size}, expected {size}")
+    return flat
@@ -0,0 +1,165 @@
+"""Cut very large segmentation masks into a multi-resolution pyramid of label tiles.
+
+compile_masks.py writes one label map capped at --max-size pixels, which the
+viewer decodes whole. For gigapixel scans that is either too coarse or too
+big, so this tool resolves the mask at full resolution and writes:
+
+  build/<id>/tiles/<level>/<col>_<row>.bin — tileSize x tileSize label indices
+                                             (edge tiles are smaller), run-length encoded
+  build/<id>/tiles.json                    — dimensions, levels, the label table and a
+                                             version hash of every tile
+
+Level 0 is full resolution; every further level halves both sides (nearest
+neighbour) until the whole mask fits in a single tile. The viewer fetches
+only the tiles under the cursor at the level matching the displayed size and
+keeps them in a bounded LRU cache.
+
+PIL decodes the whole mask into memory (it cannot read a PNG part way), so
+the decoded mask has to fit in RAM. Its colours are then resolved to labels
+one band of tile rows at a time: level 0 tiles are written per band and only
+the half-resolution labels are kept to build the coarser levels. PIL's
+decompression-bomb limit (about 179 MP) is lifted, since gigapixel masks are
+what this tool is for.
+
+Masks whose longest side is at most --min-dim, and manifests without
+segments, are skipped (and any stale pyramid removed): their compiled label
+map is already small enough, or would be all background.
+
+Usage (from the repository root):
+  python -m tools.tile_masks [--tile-size 256] [--min-dim 2048] [id ...]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+from PIL import Image
+
+from tools.content import build_dir, load_manifest, select_images, site_path
+from tools.masks import decode_runs, encode_runs, label_index, mask_path
+
+Image.MAX_IMAGE_PIXELS = None
+
+
+def pyramid(labels, tile_size, level=0, scale=1):
+    """Yield (level, scale, labels) from the given level down to a single tile."""
+    while True:
+        yield level, scale, labels
+        if max(labels.shape) <= tile_size:
+            return
+        labels = labels[::2, ::2]
+        level, scale = level + 1, scale * 2
+
+
+def mask_bands(manifest, band_height):
+    """Yield (top row, labels) for consecutive horizontal bands of the full-resolution mask.
+
+    The first crop decodes the whole image; each band is then converted and resolved on its own.
+    """
+    with Image.open(mask_path(manifest)) as im:
+        w, h = im.size
+        for top in range(0, h, band_height):
+            band = im.crop((0, top, w, min(top + band_height, h))).convert("RGB")
+            yield top, label_index(manifest["segments"], np.asarray(band))
+
+
+def write_tiles(tiles_dir, level, labels, tile_size, digest, first_row=0):
+    """Write the tiles of ``labels`` (whole tile rows, starting at tile row ``first_row``).
+
+    Each tile's name and bytes are added to ``digest``, the pyramid's version hash.
+    """
+    os.makedirs(os.path.join(tiles_dir, str(level)), exist_ok=True)
+    for row in range(-(-labels.shape[0] // tile_size)):
+        for col in range(-(-labels.shape[1] // tile_size)):
+            tile = labels[row * tile_size:(row + 1) * tile_size, col * tile_size:(col + 1) * tile_size]
+            data = encode_runs(tile)
+            if not np.array_equal(decode_runs(data, tile.size), tile.ravel()):
+                raise ValueError(f"run-length round trip failed for level {level} tile {col}_{first_row + row}")
+            name = f"{level}/{col}_{first_row + row}.bin"
+            digest.update(name.encode() + data)
+            with open(os.path.join(tiles_dir, name), "wb") as f:
+                f.write(data)
+
+
+def level_entry(scale, width, height, tile_size):
+    return {"scale": scale, "width": width, "height": height,
+            "cols": -(-width // tile_size), "rows": -(-height // tile_size)}
+
+
+def tile_mask(manifest, tile_size=256):
+    """Write the tile pyramid for one manifest and return its tiles.json dict."""
+    if tile_size % 2:
+        raise ValueError(f"tile size must be even, got {tile_size}")
+    out_dir = build_dir(manifest["id"])
+    tiles_dir = os.path.join(out_dir, "tiles")
+    shutil.rmtree(tiles_dir, ignore_errors=True)
+
+    # Level 0 band by band; the tile size is even, so every band starts on an even row
+    digest = hashlib.sha256()
+    halves = []
+    h = w = 0
+    for top, band in mask_bands(manifest, tile_size):
+        write_tiles(tiles_dir, 0, band, tile_size, digest, top // tile_size)
+        halves.append(band[::2, ::2])
+        h, w = top + band.shape[0], band.shape[1]
+    levels = [level_entry(1, w, h, tile_size)]
+    if max(h, w) > tile_size:
+        for level, scale, level_labels in pyramid(np.concatenate(halves), tile_size, 1, 2):
+            write_tiles(tiles_dir, level, level_labels, tile_size, digest)
+            levels.append(level_entry(scale, level_labels.shape[1], level_labels.shape[0], tile_size))
+
+    meta = {
+        "width": w,
+        "height": h,
+        "tileSize": tile_size,
+        "encoding": "rle",
+        "tiles": site_path(tiles_dir) + "/{level}/{col}_{row}.bin",
+        "version": digest.hexdigest()[:10],
+        "levels": levels,
+        "labels": [None] + [seg["label"] for seg in manifest["segments"]],
+    }
+    with open(os.path.join(out_dir, "tiles.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def remove_tiles(image_id):
+    out_dir = build_dir(image_id)
+    shutil.rmtree(os.path.join(out_dir, "tiles"), ignore_errors=True)
+    if os.path.exists(os.path.join(out_dir, "tiles.json")):
+        os.remove(os.path.join(out_dir, "tiles.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--tile-size", type=int, default=256)
+    parser.add_argument("--min-dim", type=int, default=2048,
+                        help="only tile masks whose longest side exceeds this many pixels (0 = all)")
+    args = parser.parse_args()
+
+    for image_id in select_images(args.ids):
+        manifest = load_manifest(image_id)
+        if not manifest["segments"]:
+            remove_tiles(image_id)
+            print(f"{image_id}: skipped (no segments)")
+            continue
+        with Image.open(mask_path(manifest)) as im:
+            too_small = max(im.size) <= args.min_dim
+        if too_small:
+            remove_tiles(image_id)
+            print(f"{image_id}: skipped (mask within {args.min_dim}px)")
+            continue
+        meta = tile_mask(manifest, args.tile_size)
+        tiles_dir = os.path.join(build_dir(image_id), "tiles")
+        count = sum(level["cols"] * level["rows"] for level in meta["levels"])
+        size = sum(os.path.getsize(os.path.join(d, name))
+                   for d, _, names in os.walk(tiles_dir) for name in names)
+        print(f"{image_id}: {meta['width']}x{meta['height']} -> {len(meta['levels'])} levels, "
+              f"{count} tiles, {size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Trace every segment of a mask into compact polygons with a grid spatial index.
+
+For every image this resolves the mask to labels (same rules as
+compile_masks.py), traces the boundary of each segment, simplifies the rings
+to a vertex budget and writes build/<id>/geometry.json:
+
+  width, height  — the coordinate space (the mask downsampled to --max-size)
+  segments       — per segment: label, area (fraction of the image), bbox
+                   [x0, y0, x1, y1], centroid, anchor (an interior point
+                   far from the edges, for keyboard focus and popups) and
+                   rings (flat [x0, y0, x1, y1, ...] lists, even-odd fill)
+  grid           — cols x rows buckets, each listing the segments whose rings
+                   reach into that cell
+
+The viewer hit-tests a pointer against the few segments in its grid cell,
+draws outlines from the rings and cycles keyboard focus through the anchors,
+without decoding the mask at all.
+
+Usage (from the repository root):
+  python -m tools.trace_segments [--max-size 512] [--max-vertices 256] [id ...]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from tools.content import build_dir, load_manifest, select_images
+from tools.masks import label_index, load_mask, sample_nearest
+
+
+def boundary_edges(inside):
+    """Return unit edges (x0, y0, x1, y1) around ``inside``, clockwise on screen (y down)."""
+    p = np.pad(inside, 1)
+    core = p[1:-1, 1:-1]
+    edges = []
+    # (neighbour outside, start corner, end corner) for top, right, bottom, left
+    for outside, (sx, sy), (ex, ey) in (
+        (~p[:-2, 1:-1], (0, 0), (1, 0)),
+        (~p[1:-1, 2:], (1, 0), (1, 1)),
+        (~p[2:, 1:-1], (1, 1), (0, 1)),
+        (~p[1:-1, :-2], (0, 1), (0, 0)),
+    ):
+        ys, xs = np.nonzero(core & outside)
+        edges.append(np.stack([xs + sx, ys + sy, xs + ex, ys + ey], axis=1))
+    return np.concatenate(edges)
+
+
+def chain_rings(edges):
+    """Join unit edges into closed rings of corner points."""
+    outgoing = {}
+    for x0, y0, x1, y1 in edges.tolist():
+        outgoing.setdefault((x0, y0), []).append((x1, y1))
+    rings = []
+    while outgoing:
+        start = next(iter(outgoing))
+        ring = [start]
+        point = start
+        while True:
+            targets = outgoing[point]
+            nxt = targets.pop()
+            if not targets:
+                del outgoing[point]
+            if nxt == start:
+                break
+            ring.append(nxt)
+            point = nxt
+        rings.append(np.array(ring, dtype=np.float64))
+    return rings
+
+
+def ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def simplify(points, epsilon):
+    """Douglas-Peucker on an open polyline; returns the kept points."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = points[b] - points[a]
+        rel = points[a + 1:b] - points[a]
+        norm = np.hypot(*seg)
+        if norm:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm
+        else:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        i = int(np.argmax(dist))
+        if dist[i] > epsilon:
+            keep[a + 1 + i] = True
+            stack += [(a, a + 1 + i), (a + 1 + i, b)]
+    return points[keep]
+
+
+def simplify_ring(ring, epsilon):
+    """Simplify a closed ring by splitting it at the point farthest from its first point."""
+    far = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    closed = np.vstack([ring, ring[:1]])
+    first = simplify(closed[:far + 1], epsilon)
+    second = simplify(closed[far:], epsilon)
+    return np.vstack([first, second[1:-1]])
+
+
+def simplify_rings(rings, max_vertices):
+    """Simplify with a growing tolerance until the rings fit in ``max_vertices`` points."""
+    epsilon = 0.5
+    while True:
+        out = [r for r in (simplify_ring(ring, epsilon) for ring in rings) if len(r) >= 3]
+        if sum(len(r) for r in out) <= max_vertices or not out:
+            return out
+        epsilon *= 1.5
+
+
+def anchor_point(inside, centroid):
+    """Return the interior pixel centre deepest inside ``inside``, nearest the centroid."""
+    core = inside
+    while True:
+        eroded = core.copy()
+        eroded[1:, :] &= core[:-1, :]
+        eroded[:-1, :] &= core[1:, :]
+        eroded[:, 1:] &= core[:, :-1]
+        eroded[:, :-1] &= core[:, 1:]
+        eroded[[0, -1], :] = False
+        eroded[:, [0, -1]] = False
+        if not eroded.any():
+            break
+        core = eroded
+    ys, xs = np.nonzero(core)
+    i = int(np.argmin((xs + 0.5 - centroid[0]) ** 2 + (ys + 0.5 - centroid[1]) ** 2))
+    return [float(xs[i]) + 0.5, float(ys[i]) + 0.5]
+
+
+def trace_segments(manifest, max_size=512, max_vertices=256, min_area=0.0002, cell=32):
+    """Return the geometry dict for one manifest."""
+    labels = label_index(manifest["segments"], sample_nearest(load_mask(manifest), max_size))
+    h, w = labels.shape
+    cols, rows = -(-w // cell), -(-h // cell)
+    grid = [[] for _ in range(cols * rows)]
+    segments = []
+    for i, seg in enumerate(manifest["segments"]):
+        inside = labels == i + 1
+        count = int(inside.sum())
+        entry = {"label": seg["label"], "area": round(count / (w * h), 5)}
+        segments.append(entry)
+        if not count:
+            entry.update(bbox=None, centroid=None, anchor=None, rings=[])
+            continue
+        ys, xs = np.nonzero(inside)
+        centroid = [round(float(xs.mean()) + 0.5, 1), round(float(ys.mean()) + 0.5, 1)]
+        rings = [r for r in chain_rings(boundary_edges(inside)) if ring_area(r) >= min_area * w * h]
+        rings = simplify_rings(rings, max_vertices)
+        entry.update(
+            bbox=[int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1],
+            centroid=centroid,
+            anchor=anchor_point(inside, centroid),
+            rings=[r.astype(int).ravel().tolist() for r in rings],
+        )
+        for ring in rings:
+            (x0, y0), (x1, y1) = ring.min(axis=0), ring.max(axis=0)
+            for row in range(max(0, int(y0) // cell), min(rows - 1, int(y1) // cell) + 1):
+                for col in range(max(0, int(x0) // cell), min(cols - 1, int(x1) // cell) + 1):
+                    if i not in grid[row * cols + col]:
+                        grid[row * cols + col].append(i)
+    return {
+        "width": w,
+        "height": h,
+        "segments": segments,
+        "grid": {"cell": cell, "cols": cols, "rows": rows, "cells": grid},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("ids", nargs="*", help="image IDs (default: all of gallery.json)")
+    parser.add_argument("--max-size", type=int, default=512,
+                        help="trace the mask downsampled so its longest side is at most this")
+    parser.add_argument("--max-vertices", type=int, default=256, help="vertex budget per segment")
+    parser.add_argument("--min-area", type=float, default=0.0002,
+                        help="drop rings smaller than this fraction of the image")
+    args = parser.parse_args()
+
+    for image_id in select_images(args.ids):
+        geometry = trace_segments(load_manifest(image_id), args.max_size, args.max_vertices, args.min_area)
+        path = os.path.join(build_dir(image_id), "geometry.json")
+        with open(path, "w") as f:
+            json.dump(geometry, f, separators=(",", ":"))
+        vertices = sum(len(r) // 2 for seg in geometry["segments"] for r in seg["rings"])
+        print(f"{image_id}: {len(geometry['segments'])} segments, {vertices} vertices, "
+              f"{os.path.getsize(path):,} bytes")
+
+
+if __name__ == "__main__":
+    main()